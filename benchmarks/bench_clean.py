@@ -0,0 +1,58 @@
+"""Timing comparison: scalar `.apply` vs vectorized price/bathroom parsing.
+
+The vectorized parsers work on unique values, so the gain comes from the
+handful of distinct price/bathroom strings a real dump has; a column where
+every value is unique gains little.
+
+    python -m benchmarks.bench_clean --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.clean import simple_bath, simple_bath_series, to_euro, to_euro_series
+
+BATH_TEXTS = ["1 bath", "1.5 baths", "2 baths", "half bath", "1 shared bath",
+              "1 private bath", "2.5 baths", "Shared half-bath", "0 baths", None]
+
+
+def synthetic_raw(n: int, seed: int = 0) -> pd.DataFrame:
+    """Raw-dump-like price/bathrooms_text columns (InsideAirbnb formats)."""
+    rng = np.random.default_rng(seed)
+    euros = rng.integers(15, 1500, size=n)
+    cents = rng.choice([0, 0, 0, 50, 99], size=n)
+    us = [f"${e:,}.{c:02d}" for e, c in zip(euros, cents)]                   # $1,234.50
+    eu = [f"€{e:,}".replace(",", ".") + f",{c:02d}" for e, c in zip(euros, cents)]  # €1.234,50
+    price = pd.Series(np.where(rng.random(n) < 0.3, eu, us), dtype=object)
+    price[rng.random(n) < 0.05] = None
+    baths = pd.Series(rng.choice(np.array(BATH_TEXTS, dtype=object), size=n), dtype=object)
+    return pd.DataFrame({"price": price, "bathrooms_text": baths})
+
+
+def _timed(fn):
+    t0 = perf_counter()
+    out = fn()
+    return out, perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    df = synthetic_raw(args.rows)
+    for col, scalar, vec in [("price", to_euro, to_euro_series),
+                             ("bathrooms_text", simple_bath, simple_bath_series)]:
+        slow, t_slow = _timed(lambda: df[col].apply(scalar))
+        fast, t_fast = _timed(lambda: vec(df[col]))
+        same = np.array_equal(slow.to_numpy(dtype=float), fast.to_numpy(), equal_nan=True)
+        print(f"{col:15s} apply {t_slow:6.2f}s | vectorized {t_fast:6.3f}s | "
+              f"x{t_slow / t_fast:5.1f} | identical={same}")
+
+
+if __name__ == "__main__":
+    main()
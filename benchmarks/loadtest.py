@@ -0,0 +1,336 @@
+"""Load test for the API: throughput, tail latency and error rate on localhost.
+
+Starts `uvicorn src.app:app` (`--preload`: `python -m src.serve`) on a free
+local port with the given model and worker count (or targets a running server
+with `--url`), waits for `/ready` and times the first prediction from the
+server's spawn, then replays a mix
+of `GET /predict` and JSON `POST /predict_batch` requests built from
+`batch.json`-style samples for `--duration` seconds, after `--warmup`
+seconds that are not counted.
+
+- `--concurrency C` (default): C clients, each sends its next request as soon
+  as the last one is answered (closed loop, measures capacity).
+- `--rate R`: R requests/s on a fixed schedule whatever the response times
+  (open loop). Latency counts from the scheduled send time, so a server that
+  falls behind shows it in the tail instead of silently slowing the client.
+
+Each request varies the samples' numeric fields (`--repeat` sends them as
+they are), so the prediction cache does not answer everything. Results per
+endpoint and overall go to `reports/loadtest_<timestamp>.json`.
+
+    python -m benchmarks.loadtest --model models/baseline.joblib --workers 2 --concurrency 16
+    python -m benchmarks.loadtest --rate 200 --mix predict=0.8,batch=0.2 --batch-size 50
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --duration 60
+
+The client is one asyncio process; on a small machine it shares the CPUs
+with the server, so compare runs made on the same host.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter, sleep
+
+import httpx
+import numpy as np
+
+SAMPLES = Path("batch.json")
+OUT_DIR = Path("reports")
+# numeric fields varied per request, with their ranges
+VARY = {"availability_365": (0, 365), "number_of_reviews": (0, 500),
+        "minimum_nights": (1, 30), "reviews_per_month": (0.0, 8.0)}
+
+
+# ---------- payloads ----------
+
+def load_samples(path=SAMPLES) -> list[dict]:
+    rows = json.loads(Path(path).read_text(encoding="utf-8-sig"))
+    if not isinstance(rows, list) or not rows:
+        raise ValueError(f"{path}: expected a non-empty JSON list of listings")
+    return rows
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """`predict=0.9,batch=0.1` -> normalised weights."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("predict", "batch"):
+            raise ValueError(f"Unknown request kind {name!r}; use predict and/or batch")
+        mix[name] = float(weight or 1)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError(f"Mix {spec!r} has no positive weight")
+    return {k: v / total for k, v in mix.items()}
+
+
+class Payloads:
+    """Random requests drawn from the samples and the mix."""
+
+    def __init__(self, samples: list[dict], mix: dict[str, float], batch_size: int = 20,
+                 repeat: bool = False, seed: int = 0):
+        self.samples = samples
+        self.kinds, self.weights = list(mix), list(mix.values())
+        self.batch_size = batch_size
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+
+    def row(self) -> dict:
+        row = dict(self.rng.choice(self.samples))
+        if not self.repeat:
+            for col, (lo, hi) in VARY.items():
+                if col in row:
+                    row[col] = (self.rng.randint(lo, hi) if isinstance(lo, int)
+                                else round(self.rng.uniform(lo, hi), 2))
+        return row
+
+    def next(self) -> tuple[str, dict]:
+        """(kind, httpx request kwargs)"""
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        if kind == "predict":
+            return kind, {"method": "GET", "url": "/predict", "params": self.row()}
+        rows = [self.row() for _ in range(self.batch_size)]
+        return kind, {"method": "POST", "url": "/predict_batch", "json": rows}
+
+
+# ---------- load generation ----------
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.statuses: dict[str, int] = {}
+        self.recording = False
+
+    def add(self, kind: str, seconds: float, status: int | str):
+        if not self.recording:
+            return
+        self.latencies.setdefault(kind, []).append(seconds)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if not (isinstance(status, int) and status < 400):
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+async def _send(client: httpx.AsyncClient, payloads: Payloads, rec: Recorder,
+                t_sched: float | None = None):
+    kind, req = payloads.next()
+    t0 = perf_counter() if t_sched is None else t_sched
+    try:
+        r = await client.request(**req)
+        await r.aread()
+        status = r.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    rec.add(kind, perf_counter() - t0, status)
+
+
+async def _closed_loop(client, payloads, rec, concurrency: int, until: float):
+    async def user():
+        while perf_counter() < until:
+            await _send(client, payloads, rec)
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def _open_loop(client, payloads, rec, rate: float, until: float):
+    interval = 1.0 / rate
+    t_next = perf_counter()
+    pending = set()
+    while t_next < until:
+        delay = t_next - perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(_send(client, payloads, rec, t_next))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        t_next += interval
+    if pending:
+        await asyncio.wait(pending)
+
+
+async def run_load(client: httpx.AsyncClient, payloads: Payloads, duration: float,
+                   warmup: float = 0.0, concurrency: int = 8,
+                   rate: float | None = None) -> dict:
+    """Drive `client` for warmup + duration seconds; returns the `summarize` report."""
+    rec = Recorder()
+    loop = (lambda until: _open_loop(client, payloads, rec, rate, until)) if rate else \
+           (lambda until: _closed_loop(client, payloads, rec, concurrency, until))
+    if warmup > 0:
+        await loop(perf_counter() + warmup)
+    rec.recording = True
+    t0 = perf_counter()
+    await loop(t0 + duration)
+    return summarize(rec, perf_counter() - t0)
+
+
+def _stats(latencies: list[float], errors: int, seconds: float) -> dict:
+    lat = np.asarray(latencies) * 1e3
+    n = len(lat)
+    pct = np.percentile(lat, [50, 95, 99]) if n else [float("nan")] * 3
+    return {"requests": n, "errors": errors, "error_rate": errors / n if n else 0.0,
+            "rps": n / seconds if seconds > 0 else 0.0,
+            "p50_ms": float(pct[0]), "p95_ms": float(pct[1]), "p99_ms": float(pct[2]),
+            "max_ms": float(lat.max()) if n else float("nan")}
+
+
+def summarize(rec: Recorder, seconds: float) -> dict:
+    endpoints = {k: _stats(v, rec.errors.get(k, 0), seconds) for k, v in rec.latencies.items()}
+    everything = [x for v in rec.latencies.values() for x in v]
+    return {"seconds": seconds, "overall": _stats(everything, sum(rec.errors.values()), seconds),
+            "endpoints": endpoints, "statuses": rec.statuses}
+
+
+# ---------- server ----------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int = 1, model: str | None = None,
+                 env: dict | None = None, preload: bool = False) -> subprocess.Popen:
+    """`uvicorn src.app:app` (or preloaded `src.serve`) on 127.0.0.1:`port`, without
+    hot reload."""
+    env = {**os.environ, "MODEL_RELOAD_INTERVAL_S": "0", **(env or {})}
+    if model:
+        env["MODEL_PATH"] = model
+        env.pop("META_PATH", None)
+        env.pop("COMPILED_PATH", None)
+        env.pop("PRICE_INDEX_PATH", None)
+    server = ["src.serve"] if preload else ["uvicorn", "src.app:app"]
+    cmd = [sys.executable, "-m", *server, "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, env=env)
+
+
+def wait_until(url: str, proc: subprocess.Popen | None = None, timeout: float = 60.0,
+               interval: float = 0.05, **request) -> float:
+    """Request `url` until it answers 200; returns the `perf_counter()` of that answer."""
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"Server exited with status {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0, **request).status_code == 200:
+                return perf_counter()
+        except httpx.HTTPError:
+            pass
+        sleep(interval)
+    raise TimeoutError(f"{url} did not answer 200 within {timeout:.0f}s")
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+# ---------- CLI ----------
+
+def _print_report(report: dict):
+    print(f"{'':10s}{'requests':>10s}{'rps':>10s}{'p50 ms':>10s}{'p95 ms':>10s}"
+          f"{'p99 ms':>10s}{'errors':>10s}")
+    for name, s in [*report["endpoints"].items(), ("overall", report["overall"])]:
+        print(f"{name:10s}{s['requests']:10d}{s['rps']:10.1f}{s['p50_ms']:10.2f}"
+              f"{s['p95_ms']:10.2f}{s['p99_ms']:10.2f}{s['error_rate']:10.2%}")
+
+
+async def _drive(base_url: str, payloads: Payloads, args) -> dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout,
+                                 limits=limits) as client:
+        return await run_load(client, payloads, args.duration, args.warmup,
+                              args.concurrency, args.rate)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test the API on localhost.")
+    ap.add_argument("--url", default=None,
+                    help="Test a running server instead of starting one")
+    ap.add_argument("--model", default=None,
+                    help="MODEL_PATH for the started server (default: from the environment)")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    ap.add_argument("--preload", action="store_true",
+                    help="Start with src.serve: load once, then fork the workers")
+    ap.add_argument("--samples", default=str(SAMPLES),
+                    help="JSON list of listings to build requests from")
+    ap.add_argument("--mix", default="predict=0.9,batch=0.1",
+                    help="Request kinds and weights, e.g. predict=0.8,batch=0.2")
+    ap.add_argument("--batch-size", type=int, default=20, help="Listings per /predict_batch")
+    ap.add_argument("--repeat", action="store_true",
+                    help="Send the samples unchanged (prediction cache hits)")
+    load = ap.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=8, help="Closed-loop clients")
+    load.add_argument("--rate", type=float, default=None, help="Open-loop requests per second")
+    ap.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    ap.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds first")
+    ap.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (s)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None,
+                    help="Report path (default reports/loadtest_<timestamp>.json)")
+    args = ap.parse_args()
+
+    payloads = Payloads(load_samples(args.samples), parse_mix(args.mix), args.batch_size,
+                        args.repeat, args.seed)
+    proc, startup = None, None
+    base_url = args.url
+    if base_url is None:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        t_spawn = perf_counter()
+        proc = start_server(port, args.workers, args.model, preload=args.preload)
+    try:
+        if proc is None:
+            wait_until(base_url + "/ready")
+        else:
+            # from spawn: /ready turns green, then the first /predict answers
+            # (with several workers, the one that answered)
+            t_ready = wait_until(base_url + "/ready", proc, interval=0.01)
+            t_first = wait_until(base_url + "/predict", proc, interval=0.01,
+                                 params=payloads.row())
+            startup = {"ready_seconds": t_ready - t_spawn,
+                       "first_prediction_seconds": t_first - t_spawn}
+            print(f"Server on {base_url} ({args.workers} worker(s)"
+                  f"{', preloaded' if args.preload else ''}): ready in "
+                  f"{startup['ready_seconds']:.2f}s, first prediction after "
+                  f"{startup['first_prediction_seconds']:.2f}s")
+        mode = f"rate {args.rate:g}/s" if args.rate else f"concurrency {args.concurrency}"
+        print(f"Load: {mode}, mix {args.mix}, {args.warmup:g}s warm-up + {args.duration:g}s")
+        report = asyncio.run(_drive(base_url, payloads, args))
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    report.update({
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "config": {"url": args.url, "model": args.model, "workers": args.workers,
+                   "preload": args.preload,
+                   "mix": parse_mix(args.mix), "batch_size": args.batch_size,
+                   "concurrency": None if args.rate else args.concurrency, "rate": args.rate,
+                   "duration": args.duration, "warmup": args.warmup, "repeat": args.repeat},
+        "startup": startup,
+        "machine": {"python": platform.python_version(), "cpus": os.cpu_count(),
+                    "platform": platform.platform()},
+    })
+    _print_report(report)
+    out = Path(args.out or OUT_DIR / f"loadtest_{datetime.now():%Y%m%d-%H%M%S}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"✅ Report -> {out.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
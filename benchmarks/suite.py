@@ -0,0 +1,174 @@
+"""Offline benchmark suite with a stored baseline and regression gate.
+
+Runs on synthetic listings (`src.synthetic`) at several sizes and measures,
+per size:
+
+- cleaning throughput of `prepare_features` on a raw-dump-like frame
+- `train_on_df` wall time and the saved model's size on disk
+- single-row latency (p50/p99) of the serving path (`load_model`)
+- batch predict throughput of the sklearn pipeline
+
+Results go to `reports/benchmarks.json`. With a baseline file present, any
+metric that is worse than the baseline by more than `--threshold` (relative)
+is reported and the run exits with status 1. With `--gate` a missing
+baseline fails the run too, so a CI gate nobody has baselined cannot pass.
+
+    python -m benchmarks.suite                          # run + compare
+    python -m benchmarks.suite --save-baseline          # record the baseline
+    python -m benchmarks.suite --sizes 1000 --threshold 0.5
+    python -m benchmarks.suite --gate                   # CI: fail without a baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.clean import prepare_features
+from src.model_store import WARMUP_ROW, load_model
+from src.models.train import FEATURES, save_model, train_on_df
+from src.synthetic import dummy_df, synthetic_dump
+
+OUT = Path("reports/benchmarks.json")
+BASELINE = Path("benchmarks/baseline.json")
+# everything else is a time or a size, where lower is better
+HIGHER_IS_BETTER = {"clean_rows_per_s", "batch_rows_per_s"}
+
+
+def _best_of(fn, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = perf_counter()
+        fn()
+        best = min(best, perf_counter() - t0)
+    return best
+
+
+def bench_size(n: int, workdir: Path, latency_calls: int = 200) -> dict:
+    raw = synthetic_dump(n)
+    t_clean = _best_of(lambda: prepare_features(raw))
+
+    df = dummy_df(n)
+    t0 = perf_counter()
+    pipe, _ = train_on_df(df)
+    t_train = perf_counter() - t0
+
+    model_path = workdir / f"model_{n}.joblib"
+    save_model(pipe, model_path, {})
+    size_mb = model_path.stat().st_size / 2**20
+
+    loaded = load_model(model_path).warm_up()
+    row = [dict(WARMUP_ROW)]
+    lat = np.empty(latency_calls)
+    for i in range(latency_calls):
+        t0 = perf_counter()
+        loaded.predict_rows(row)
+        lat[i] = perf_counter() - t0
+
+    X = df[FEATURES]
+    t_batch = _best_of(lambda: pipe.predict(X))
+
+    return {
+        "clean_rows_per_s": n / t_clean,
+        "train_seconds": t_train,
+        "model_size_mb": size_mb,
+        "predict_p50_ms": float(np.percentile(lat, 50) * 1e3),
+        "predict_p99_ms": float(np.percentile(lat, 99) * 1e3),
+        "batch_rows_per_s": n / t_batch,
+    }
+
+
+def run(sizes, latency_calls: int = 200) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            print(f"Benchmarking {n} rows ...")
+            results[str(n)] = bench_size(n, Path(tmp), latency_calls)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "sklearn": sklearn.__version__,
+                    "pandas": pd.__version__, "cpus": os.cpu_count(),
+                    "platform": platform.platform()},
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Describe every metric worse than the baseline by more than `threshold`."""
+    regressions = []
+    for size, metrics in current["results"].items():
+        base = baseline.get("results", {}).get(size, {})
+        for name, value in metrics.items():
+            if name not in base or not base[name]:
+                continue
+            change = (value - base[name]) / base[name]
+            worse = -change if name in HIGHER_IS_BETTER else change
+            if worse > threshold:
+                regressions.append(f"n={size} {name}: {base[name]:.4g} -> {value:.4g} "
+                                   f"({change:+.0%}, threshold {threshold:.0%})")
+    return regressions
+
+
+def _print_table(report: dict):
+    sizes = list(report["results"])
+    names = list(next(iter(report["results"].values())))
+    print(f"{'metric':18s}" + "".join(f"{'n=' + s:>14s}" for s in sizes))
+    for name in names:
+        print(f"{name:18s}" + "".join(f"{report['results'][s][name]:14.4g}" for s in sizes))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    ap.add_argument("--latency-calls", type=int, default=200)
+    ap.add_argument("--out", default=str(OUT))
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--threshold", type=float, default=0.25,
+                    help="Allowed relative slowdown/growth per metric (0.25 = 25%%)")
+    ap.add_argument("--save-baseline", action="store_true",
+                    help="Write this run to --baseline instead of comparing")
+    ap.add_argument("--gate", action="store_true",
+                    help="CI mode: a missing baseline is an error (exit 1), not a note")
+    args = ap.parse_args()
+
+    baseline = Path(args.baseline)
+    if args.gate and not args.save_baseline and not baseline.is_file():
+        sys.exit(f"❌ No baseline at {baseline}: record one with --save-baseline "
+                 f"before gating on it.")
+
+    report = run(args.sizes, args.latency_calls)
+    _print_table(report)
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"✅ Results -> {out.resolve()}")
+
+    if args.save_baseline:
+        baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✅ Baseline saved -> {baseline.resolve()}")
+        return
+    if not baseline.is_file():
+        print(f"No baseline at {baseline}; run with --save-baseline to record one.")
+        return
+    regressions = compare(report, json.loads(baseline.read_text(encoding="utf-8")),
+                          args.threshold)
+    for r in regressions:
+        print("❌ Regression:", r)
+    if regressions:
+        sys.exit(1)
+    print("✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,217 @@
-from fastapi import FastAPI, Query
-import pandas as pd
-import joblib
+import os
+import tempfile
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, Literal
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+
+# pandas (via src.bulk) is imported by _warm_bulk after startup, or preloaded by
+# src.serve: a compiled model answers /predict without it
+from src.batching import MicroBatcher
+from src.cache import PredictionCache
+from src.jobs import INPUT_SUFFIXES, JobManager
+from src.metrics import (SIZE_BUCKETS, Counter, Gauge, Histogram, MetricsMiddleware,
+                         Registry)
+from src.model_store import WARMUP_ROW, LoadedModel, ModelWatcher, load_model
+from src.models.compile import SPEC_FILE, compiled_path_for
+from src.models.price_index import PriceIndex, index_path_for
+from src.registry import ModelRegistry
+from src.startup import timeline
+
+if TYPE_CHECKING:
+    from src import bulk
+
+MODEL_PATH = os.getenv("MODEL_PATH", "models/baseline.joblib")
+META_PATH = os.getenv("META_PATH", MODEL_PATH + ".meta.json")
+COMPILED_PATH = os.getenv("COMPILED_PATH", str(compiled_path_for(MODEL_PATH)))
+# Price statistics per neighbourhood/room type/size, written by train.py; answers
+# ?mode=index requests and replaces the demo formula when no model is loaded
+PRICE_INDEX_PATH = os.getenv("PRICE_INDEX_PATH", str(index_path_for(MODEL_PATH)))
+# Poll the model files this often and swap in a new model when they change (0 = off)
+MODEL_RELOAD_INTERVAL_S = float(os.getenv("MODEL_RELOAD_INTERVAL_S", "5"))
+
+# Other cities / versions, loaded on demand from MODELS_DIR (?city=...&version=...) and
+# kept while their total footprint fits in MODEL_MEMORY_MB (least recently used go first)
+MODELS_DIR = os.getenv("MODELS_DIR", "models")
+MODEL_MEMORY_MB = float(os.getenv("MODEL_MEMORY_MB", "1024"))
+DEFAULT_CITY = os.getenv("DEFAULT_CITY", "berlin")
+# An unknown city/version rescans MODELS_DIR at most this often
+MODELS_RESCAN_S = float(os.getenv("MODELS_RESCAN_S", "30"))
+
+# Optional micro-batching of concurrent /predict calls
+BATCHING = os.getenv("BATCHING", "0") == "1"
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "2"))
+
+# In-process prediction cache (PREDICT_CACHE_SIZE=0 disables it)
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "10000"))
+PREDICT_CACHE_TTL_S = float(os.getenv("PREDICT_CACHE_TTL_S", "0")) or None
+PREDICT_CACHE_DECIMALS = int(os.getenv("PREDICT_CACHE_DECIMALS", "6"))
+
+# POST /predict_batch: rows scored per chunk, and request bytes kept in RAM before
+# the body is spooled to a temp file
+BULK_CHUNK_ROWS = int(os.getenv("BULK_CHUNK_ROWS", "10000"))
+BULK_SPOOL_MB = int(os.getenv("BULK_SPOOL_MB", "32"))
+
+# Background scoring jobs (/jobs): pool size, rows per chunk, CPU niceness of the
+# workers, where job files go and which server-side directory `path` inputs may name
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_CHUNK_ROWS = int(os.getenv("JOB_CHUNK_ROWS", "50000"))
+JOB_NICE = int(os.getenv("JOB_NICE", "10"))
+JOBS_DIR = os.getenv("JOBS_DIR", "outputs/jobs")
+JOB_DATA_DIR = os.getenv("JOB_DATA_DIR", "data")
+# uploaded job files and spooled /predict_batch bodies are buffered this much
+# between writes, which run off the event loop
+UPLOAD_WRITE_BYTES = 1 << 20
+
+# Prometheus metrics at /metrics; METRICS=0 removes the instrumentation entirely
+METRICS = os.getenv("METRICS", "1") == "1"
+
+DEFAULT_FEATURES = [
+    "room_type", "neighbourhood", "accommodates", "bedrooms", "bathrooms_num",
+    "minimum_nights", "number_of_reviews", "reviews_per_month", "availability_365",
+]
+
+registry = Registry()
+REQUESTS = registry.add(Counter("airbnb_requests_total", "HTTP requests handled",
+                                ("endpoint", "method", "status")))
+REQUEST_SECONDS = registry.add(Histogram("airbnb_request_duration_seconds",
+                                         "End-to-end request latency", ("endpoint",)))
+STAGE_SECONDS = registry.add(Histogram(
+    "airbnb_stage_duration_seconds",
+    "Latency per stage: validation, cache, parse, frame, preprocess, model",
+    ("endpoint", "stage")))
+BATCH_ROWS = registry.add(Histogram("airbnb_batch_rows", "Rows per model call",
+                                    ("endpoint",), SIZE_BUCKETS))
+MODEL_LOAD_SECONDS = registry.add(Gauge("airbnb_model_load_seconds",
+                                        "Time to load the served model"))
+MODEL_WARMUP_SECONDS = registry.add(Gauge("airbnb_model_warmup_seconds",
+                                          "Time of the warm-up prediction"))
+MODEL_INFO = registry.add(Gauge("airbnb_model_info", "Served model (value is always 1)",
+                                ("version", "kind", "path")))
+STARTUP_SECONDS = registry.add(Gauge(
+    "airbnb_startup_seconds",
+    "Seconds from process start to each startup phase: imported, loaded, ready, "
+    "first_prediction", ("phase",)))
+FIRST_PREDICTION_SECONDS = registry.add(Gauge(
+    "airbnb_time_to_first_prediction_seconds",
+    "Seconds from process start to the first request answered by the model"))
+
+
+def _startup_phase(phase: str, seconds: float):
+    STARTUP_SECONDS.set(phase, value=seconds)
+    if phase == "first_prediction":
+        FIRST_PREDICTION_SECONDS.set(value=seconds)
+        print(f"First prediction {seconds:.2f}s after process start")
+
+
+timeline.on_mark(_startup_phase)
+
+# Currently served model; replaced as a whole on reload so a request never sees
+# a half-swapped model. None -> demo formula (e.g. Render demo without artifacts).
+loaded: LoadedModel | None = None
+price_index: PriceIndex | None = None
+# set by preload() (src.serve) before forking workers, which then skip loading
+preloaded = False
+# True while the lifespan's background thread loads the default model
+loading = False
+watcher: ModelWatcher | None = None
+
+
+def _load_index():
+    global price_index
+    if Path(PRICE_INDEX_PATH).is_file():
+        price_index = PriceIndex.load(PRICE_INDEX_PATH)
+
+
+def _load():
+    global loaded
+    _load_index()
+    if not (Path(MODEL_PATH).is_file() or (Path(COMPILED_PATH) / SPEC_FILE).is_file()):
+        print(f"No model at {MODEL_PATH}; serving demo predictions")
+        timeline.mark("ready")
+        return
+    new = load_model(MODEL_PATH, META_PATH, COMPILED_PATH)
+    timeline.mark("loaded")
+    new.warm_up()
+    loaded = new
+    models.share(new)   # ?city=<default city> serves this instance
+    MODEL_LOAD_SECONDS.set(value=new.load_seconds)
+    MODEL_WARMUP_SECONDS.set(value=new.warmup_seconds)
+    MODEL_INFO.replace(new.version, new.kind, new.path)
+    print(f"Loaded {new.kind} model {MODEL_PATH} (version {new.version}) "
+          f"in {new.load_seconds:.2f}s, warm-up {new.warmup_seconds * 1e3:.1f} ms")
+    if timeline.mark("ready"):
+        print(f"Ready {timeline.phases['ready']:.2f}s after process start")
+
+
+def _warm_bulk():
+    """Import pandas and the bulk parsers and score one frame, so the first
+    /predict_batch does not pay for them."""
+    import pandas as pd
+    from src import bulk
+
+    try:
+        X = bulk.validate(pd.DataFrame([WARMUP_ROW]), _features(loaded))
+        if loaded is not None:
+            loaded.predict_frame(X)
+    except (ValueError, KeyError) as e:   # a model with other features
+        print(f"Bulk warm-up skipped: {e}")
+
+
+def preload():
+    """Load and warm everything in this process; workers forked afterwards share it."""
+    global preloaded
+    _load()
+    _warm_bulk()
+    preloaded = True
+
+
+def _start_watcher():
+    global watcher
+    if MODEL_RELOAD_INTERVAL_S > 0:
+        watcher = ModelWatcher([MODEL_PATH, META_PATH, Path(COMPILED_PATH) / SPEC_FILE,
+                                PRICE_INDEX_PATH], _load, MODEL_RELOAD_INTERVAL_S)
+        watcher.start()
+
+
+def _load_in_background():
+    """Load, then watch the files and import pandas, while the server already answers
+    /health (and /ready with 503)."""
+    global loading
+    try:
+        _load()
+    except Exception as e:
+        print(f"Model load failed, /ready stays red until the model files change: {e}")
+    finally:
+        loading = False
+    _start_watcher()
+    _warm_bulk()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global loading, watcher
+    loader = None
+    if preloaded:
+        _start_watcher()
+    else:
+        loading = True
+        loader = threading.Thread(target=_load_in_background, name="model-load", daemon=True)
+        loader.start()
+    yield
+    if loader is not None:
+        await run_in_threadpool(loader.join)
+    if watcher is not None:
+        watcher.stop()
+        watcher = None
+    jobs.shutdown()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -9,19 +220,106 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
+if METRICS:
+    app.add_middleware(MetricsMiddleware, requests=REQUESTS, duration=REQUEST_SECONDS,
+                       skip=("/metrics", "/health", "/ready"))
+
+
+def _observe(endpoint: str, stages: dict):
+    for stage, seconds in stages.items():
+        STAGE_SECONDS.observe(endpoint, stage, value=seconds)
+
+
+def _predict_rows(rows: list[dict], current: LoadedModel | None = None):
+    """Score a list of feature dicts with the given (default: currently loaded) model."""
+    current = current or loaded
+    if not METRICS:
+        return current.predict_rows(rows)
+    stages = {}
+    preds = current.predict_rows(rows, stages)
+    _observe("/predict", stages)
+    BATCH_ROWS.observe("/predict", value=len(rows))
+    return preds
+
+
+models = ModelRegistry(MODELS_DIR, MODEL_MEMORY_MB, DEFAULT_CITY, rescan_s=MODELS_RESCAN_S)
+
+
+async def _select(city: str | None, version: str | None) -> LoadedModel | None:
+    """The default model, or the registry's model for an explicit city/version."""
+    if city is None and version is None:
+        # demo prices are for a missing model, not one that is still loading
+        if loaded is None and loading and price_index is None:
+            raise HTTPException(503, "Model is still loading; see /ready")
+        return loaded
+    try:
+        return await run_in_threadpool(models.get, city, version)
+    except KeyError as e:
+        raise HTTPException(404, e.args[0])
+
+
+jobs = JobManager(JOBS_DIR, JOB_WORKERS, JOB_CHUNK_ROWS, JOB_NICE)
+
+batcher = MicroBatcher(_predict_rows, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if BATCHING else None
+cache = (PredictionCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL_S, PREDICT_CACHE_DECIMALS)
+         if PREDICT_CACHE_SIZE > 0 else None)
 
-# Disable model loading (for Render demo)
-model = None
-meta = {}
 
 @app.get("/")
 def root():
     return {"message": "Welcome to the Airbnb Price Prediction API 🚀"}
 
+@app.get("/health")
+def health():
+    """Liveness: the process is up and serving HTTP (the model may still be loading)."""
+    return {"status": "ok", "uptime_seconds": round(timeline.uptime(), 3)}
+
+@app.get("/ready")
+def ready():
+    """Readiness: 200 once the default model is loaded and warmed up, 503 before."""
+    body = {"ready": timeline.ready, "model_loaded": loaded is not None,
+            "version": loaded.version if loaded is not None else None,
+            "startup_seconds": timeline.report()}
+    return JSONResponse(body, status_code=200 if timeline.ready else 503)
+
+@app.get("/model_info")
+def model_info():
+    if loaded is None:
+        return {"loaded": False, "model_path": MODEL_PATH}
+    return {"loaded": True, "model_path": loaded.path, "kind": loaded.kind,
+            "version": loaded.version, "metrics": loaded.meta.get("metrics"),
+            "load_seconds": loaded.load_seconds, "warmup_seconds": loaded.warmup_seconds}
+
+@app.get("/models")
+def list_models():
+    """Artifacts found in MODELS_DIR and the ones currently loaded, with their memory."""
+    models.scan()
+    return models.status()
+
+@app.get("/metrics")
+def metrics():
+    if not METRICS:
+        raise HTTPException(404, "Metrics are disabled (METRICS=0)")
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/cache_stats")
+def cache_stats():
+    return cache.stats() if cache is not None else {"enabled": False}
+
+def _index_estimate(row: dict) -> dict:
+    if price_index is None:
+        raise HTTPException(503, f"No price index at {PRICE_INDEX_PATH}")
+    est = price_index.lookup(row)
+    return {"estimated_price": est["price"], "p25": est["p25"], "p75": est["p75"],
+            "sample_size": est["sample_size"], "level": est["level"]}
+
+
 @app.get("/predict")
-def predict(
+async def predict(
+    request: Request,
     room_type: str = Query(..., example="Entire home/apt"),
     neighbourhood: str = Query(..., example="Kreuzberg"),
     accommodates: int = Query(..., example=2),
@@ -30,9 +328,13 @@ def predict(
     minimum_nights: int = Query(..., example=3),
     number_of_reviews: int = Query(..., example=50),
     reviews_per_month: float = Query(..., example=2.0),
-    availability_365: int = Query(..., example=150)
+    availability_365: int = Query(..., example=150),
+    city: str | None = Query(None, description="Serve a model from MODELS_DIR for this city"),
+    version: str | None = Query(None, description="Model version (default: newest)"),
+    mode: Literal["model", "index"] = Query(
+        "model", description="index: median of similar listings from the price index"),
 ):
-    sample = pd.DataFrame([{
+    row = {
         "room_type": room_type,
         "neighbourhood": neighbourhood,
         "accommodates": accommodates,
@@ -42,13 +344,292 @@ def predict(
         "number_of_reviews": number_of_reviews,
         "reviews_per_month": reviews_per_month,
         "availability_365": availability_365
-    }])
+    }
+
+    t_start = getattr(request.state, "t_start", None)
+    if t_start is not None:
+        # routing + query parsing/validation, up to the start of this handler
+        STAGE_SECONDS.observe("/predict", "validation", value=perf_counter() - t_start)
 
-    # Fake prediction for demo (no model loaded)
-    if model is None:
+    if mode == "index":
+        return _index_estimate(row)
+    # No model loaded: price index if there is one, else a fake demo prediction
+    current = await _select(city, version)
+    if current is None and price_index is not None:
+        return _index_estimate(row)
+    if current is None:
         demo_price = 80 + accommodates * 15 + bedrooms * 25  # simple example
         return {"predicted_price_demo": round(float(demo_price), 2)}
 
     # If model exists, make a real prediction
-    pred = model.predict(sample)[0]
-    return {"predicted_price": round(float(pred), 2)}
\ No newline at end of file
+    # cache and batcher serve the default model only
+    default = current is loaded
+    pred = None
+    if cache is not None and default:
+        t0 = perf_counter()
+        pred = cache.get(row, current.version)
+        if METRICS:
+            STAGE_SECONDS.observe("/predict", "cache", value=perf_counter() - t0)
+    if pred is None:
+        if batcher is not None and default:
+            pred = await batcher.predict(row)
+        else:
+            pred = (await run_in_threadpool(_predict_rows, [row], current))[0]
+        # a reload during the await may have scored this row with the new model
+        if cache is not None and default and current is loaded:
+            cache.put(row, current.version, pred)
+    timeline.mark("first_prediction")
+    return {"predicted_price": round(float(pred), 2)}
+
+
+# ---------- bulk scoring ----------
+
+INDEX_FEATURES = ["neighbourhood", "room_type", "accommodates"]
+
+
+def _features(current: LoadedModel | None) -> list[str]:
+    if current is None:
+        return DEFAULT_FEATURES
+    if current.engine is not None:
+        return current.engine.features
+    return current.meta.get("features") or DEFAULT_FEATURES
+
+
+def _score_frame(current: LoadedModel | None, X, stages: dict | None = None,
+                 mode: str = "model"):
+    """Predictions for a validated chunk, the response field they go in and any extra
+    columns (the index's sample size)."""
+    if mode == "index" or (current is None and price_index is not None):
+        est = price_index.lookup_frame(X)
+        return est["price"], "estimated_price", {"sample_size": est["sample_size"]}
+    if current is None:
+        return 80 + X["accommodates"] * 15 + X["bedrooms"] * 25, "predicted_price_demo", None
+    return current.predict_frame(X, stages), "predicted_price", None
+
+
+def _score_next(chunks, current, features, writer: "bulk.Writer", offset: int,
+                mode: str = "model"):
+    """Read, validate and score the next chunk; returns (bytes, rows) or None at the end."""
+    from src import bulk
+
+    t0 = perf_counter()
+    df = next(chunks, None)
+    if df is None:
+        return None
+    t1 = perf_counter()
+    X = bulk.validate(df, features, offset)
+    t2 = perf_counter()
+    stages = {"parse": t1 - t0, "validation": t2 - t1} if METRICS else None
+    preds, column, extra = _score_frame(current, X, stages, mode)
+    if METRICS:
+        _observe("/predict_batch", stages)
+        BATCH_ROWS.observe("/predict_batch", value=len(df))
+    return writer.write(bulk.result_frame(df, preds, column, extra)), len(df)
+
+
+async def _write_body(request: Request, f):
+    """Stream the body into `f`, writing ~UPLOAD_WRITE_BYTES at a time in the threadpool."""
+    parts, size = [], 0
+    async for part in request.stream():
+        parts.append(part)
+        size += len(part)
+        if size >= UPLOAD_WRITE_BYTES:
+            await run_in_threadpool(f.writelines, parts)
+            parts, size = [], 0
+    await run_in_threadpool(f.writelines, parts)
+
+
+async def _save_upload(request: Request, path: Path):
+    f = await run_in_threadpool(open, path, "wb")
+    try:
+        await _write_body(request, f)
+    finally:
+        await run_in_threadpool(f.close)
+
+
+async def _spool(request: Request):
+    # past BULK_SPOOL_MB the spooled file is on disk: its writes must not block the loop
+    body = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_MB * 2**20)
+    try:
+        await _write_body(request, body)
+    except BaseException:
+        body.close()
+        raise
+    body.seek(0)
+    return body
+
+
+@app.post("/predict_batch")
+async def predict_batch(request: Request, city: str | None = None, version: str | None = None,
+                        mode: Literal["model", "index"] = "model"):
+    """Score many listings.
+
+    - `application/json`: a list of listing objects -> `{"predicted_prices": [...]}`
+    - `text/csv`, `application/x-ndjson`, `application/vnd.apache.arrow.stream`:
+      columnar rows, scored `BULK_CHUNK_ROWS` at a time and streamed back in the
+      same format (`predicted_price` per row, plus `id` when the input has one).
+      A chunk that fails validation after the first ends the stream with an
+      error line (CSV/NDJSON) or a truncated stream (Arrow).
+
+    `?city=...&version=...` selects a model from MODELS_DIR, as for `/predict`;
+    `?mode=index` answers from the price index (`estimated_price` + `sample_size`).
+    """
+    import pandas as pd
+    from src import bulk
+
+    if mode == "index" and price_index is None:
+        raise HTTPException(503, f"No price index at {PRICE_INDEX_PATH}")
+    current = None if mode == "index" else await _select(city, version)
+    features = INDEX_FEATURES if mode == "index" else _features(current)
+    content_type = request.headers.get("content-type", "application/json")
+    fmt = bulk.media_type(content_type)
+
+    if fmt is None:
+        if not content_type.startswith("application/json"):
+            raise HTTPException(415, f"Unsupported content type: {content_type}")
+        rows = await request.json()
+        if not isinstance(rows, list):
+            raise HTTPException(422, "Expected a JSON list of listings")
+        if not rows:
+            return {"predicted_prices": []}
+        try:
+            X = bulk.validate(pd.DataFrame(rows), features)
+        except ValueError as e:
+            raise HTTPException(422, str(e))
+        preds, column, extra = await run_in_threadpool(_score_frame, current, X, None, mode)
+        if extra is not None:
+            return {"estimated_prices": preds.tolist(),
+                    "sample_sizes": extra["sample_size"].tolist()}
+        if current is not None:
+            timeline.mark("first_prediction")
+        key = "predicted_prices" if current is not None else "predicted_prices_demo"
+        return {key: bulk.result_frame(X, preds, column)[column].tolist()}
+
+    body = await _spool(request)
+    writer = bulk.Writer(fmt)
+    chunks = bulk.read_chunks(body, fmt, BULK_CHUNK_ROWS)
+    try:
+        # the first chunk is checked before any byte is sent, so bad input is a 422
+        first = await run_in_threadpool(_score_next, chunks, current, features, writer, 0,
+                                        mode)
+    except ValueError as e:
+        chunks.close()
+        body.close()
+        raise HTTPException(422, str(e))
+    if first is None:
+        body.close()
+        return Response(writer.close(), media_type=fmt)
+    if current is not None:
+        timeline.mark("first_prediction")
+
+    async def stream():
+        try:
+            data, offset = first
+            yield data
+            while True:
+                try:
+                    nxt = await run_in_threadpool(_score_next, chunks, current, features,
+                                                  writer, offset, mode)
+                except ValueError as e:
+                    yield writer.error(str(e))
+                    return
+                if nxt is None:
+                    break
+                data, n = nxt
+                offset += n
+                yield data
+            yield writer.close()
+        finally:
+            chunks.close()   # before the body, so the reader does not touch a closed file
+            body.close()
+
+    return StreamingResponse(stream(), media_type=fmt)
+
+
+
+# ---------- background jobs ----------
+
+UPLOAD_SUFFIX = {"text/csv": ".csv", "application/gzip": ".csv.gz",
+                 "application/x-gzip": ".csv.gz", "application/vnd.apache.parquet": ".parquet",
+                 "application/x-parquet": ".parquet"}
+
+
+def _job_input(path: str) -> Path:
+    """A server-side input file; only files under JOB_DATA_DIR may be named."""
+    root = Path(JOB_DATA_DIR).resolve()
+    p = (root / path).resolve() if not Path(path).is_absolute() else Path(path).resolve()
+    if not p.is_relative_to(root):
+        raise HTTPException(403, f"Input must be under {JOB_DATA_DIR}/")
+    if not p.is_file():
+        raise HTTPException(404, f"No such file: {path}")
+    if not p.name.endswith(INPUT_SUFFIXES):
+        raise HTTPException(415, f"Unsupported input {p.name}; use {', '.join(INPUT_SUFFIXES)}")
+    return p
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: Request, city: str | None = None, version: str | None = None):
+    """Score a whole listings file in the background.
+
+    - `application/json` `{"path": "listings.csv.gz"}`: a file under `JOB_DATA_DIR`
+    - `text/csv`, `application/gzip` (CSV.gz), `application/vnd.apache.parquet`: the file
+      itself as the request body
+
+    Returns the job id; poll `GET /jobs/{id}` and download `GET /jobs/{id}/result` (Parquet).
+    """
+    if city is None and version is None:
+        model_path, meta_path = MODEL_PATH, META_PATH
+        if not Path(model_path).is_file():
+            raise HTTPException(503, f"No model at {MODEL_PATH}")
+    else:
+        try:
+            art = await run_in_threadpool(models.resolve, city, version)
+        except KeyError as e:
+            raise HTTPException(404, e.args[0])
+        model_path, meta_path = art.model_path, art.meta_path
+
+    content_type = request.headers.get("content-type", "application/json").split(";")[0]
+    if content_type == "application/json":
+        body = await request.json()
+        if not isinstance(body, dict) or not isinstance(body.get("path"), str):
+            raise HTTPException(422, 'Expected {"path": "<file under JOB_DATA_DIR>"}')
+        inp, job_id = _job_input(body["path"]), None
+    elif content_type in UPLOAD_SUFFIX:
+        job_id, job_dir = jobs.new_job_dir()
+        inp = job_dir / f"input{UPLOAD_SUFFIX[content_type]}"
+        await _save_upload(request, inp)
+    else:
+        raise HTTPException(415, f"Unsupported content type: {content_type}")
+
+    status = await run_in_threadpool(jobs.submit, inp, model_path, meta_path, job_id,
+                                     city=city, version=version)
+    return {**status, "status_url": f"/jobs/{status['id']}",
+            "result_url": f"/jobs/{status['id']}/result"}
+
+
+@app.get("/jobs")
+def list_jobs():
+    return jobs.list()
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    status = jobs.status(job_id)
+    if status is None:
+        raise HTTPException(404, f"No job {job_id}")
+    return status
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    status = jobs.status(job_id)
+    if status is None:
+        raise HTTPException(404, f"No job {job_id}")
+    path = jobs.result_path(job_id)
+    if status.get("state") != "done" or path is None:
+        raise HTTPException(409, f"Job {job_id} is {status.get('state')}")
+    return FileResponse(path, media_type="application/vnd.apache.parquet",
+                        filename=f"predictions_{job_id}.parquet")
+
+
+timeline.mark("imported")
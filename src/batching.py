@@ -0,0 +1,60 @@
+"""Coalesce concurrent single-row predictions into one vectorized call.
+
+Requests arriving within `max_wait_ms` of the first pending one (or until
+`max_batch_size` rows are waiting) are scored together by `predict_many`,
+which runs in a worker thread so the event loop keeps accepting requests.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Sequence
+
+
+class MicroBatcher:
+    def __init__(self, predict_many: Callable[[list[dict]], Sequence[float]],
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_many = predict_many
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait_ms = float(max_wait_ms)
+        self.n_batches = 0
+        self.n_rows = 0
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # the loop keeps only weak references to tasks: hold in-flight batches here
+        self._tasks: set[asyncio.Task] = set()
+
+    async def predict(self, row: dict) -> float:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((row, fut))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[dict, asyncio.Future]]):
+        self.n_batches += 1
+        self.n_rows += len(batch)
+        try:
+            preds = await asyncio.to_thread(self.predict_many, [row for row, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), pred in zip(batch, preds):
+            if not fut.done():
+                fut.set_result(float(pred))
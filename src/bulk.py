@@ -0,0 +1,118 @@
+"""Columnar input/output for the bulk `POST /predict_batch` endpoint.
+
+Requests are read chunk by chunk from the (spooled) body as CSV, NDJSON or an
+Arrow IPC stream, validated per column and written back in the same format
+as soon as each chunk is scored, so memory stays bounded by the chunk size
+rather than the request size.
+"""
+from __future__ import annotations
+
+import io
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+CSV = "text/csv"
+NDJSON = "application/x-ndjson"
+ARROW = "application/vnd.apache.arrow.stream"
+FORMATS = {CSV, NDJSON, ARROW}
+
+CATEGORICAL = {"room_type", "neighbourhood"}
+ID = "id"   # passed through to the output when present
+
+
+def media_type(content_type: str | None) -> str | None:
+    """Normalised format of a Content-Type header, or None if unsupported."""
+    base = (content_type or "").split(";")[0].strip().lower()
+    if base in ("application/ndjson", "application/jsonl", "application/jsonlines"):
+        return NDJSON
+    return base if base in FORMATS else None
+
+
+def read_chunks(body, fmt: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield raw DataFrame chunks from a binary file object."""
+    if fmt == CSV:
+        yield from pd.read_csv(body, chunksize=chunksize, dtype=str, keep_default_na=True)
+    elif fmt == NDJSON:
+        yield from pd.read_json(body, lines=True, chunksize=chunksize, dtype=False)
+    else:
+        import pyarrow as pa
+        reader = pa.ipc.open_stream(body)
+        for batch in reader:
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
+
+
+def validate(df: pd.DataFrame, features: list[str], offset: int = 0) -> pd.DataFrame:
+    """Model input for one chunk; raises ValueError naming the column and row at fault."""
+    missing = [c for c in features if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    out = {}
+    for c in features:
+        col = df[c]
+        if c in CATEGORICAL:
+            bad = col.isna().to_numpy()
+            values = col.astype(object)
+        else:
+            values = pd.to_numeric(col, errors="coerce").astype(np.float64)
+            bad = values.isna().to_numpy()
+        if bad.any():
+            row = offset + int(np.argmax(bad))
+            raise ValueError(f"Column '{c}': missing or invalid value at row {row} "
+                             f"({df[c].iloc[int(np.argmax(bad))]!r})")
+        out[c] = values.to_numpy()
+    return pd.DataFrame(out)
+
+
+def result_frame(df: pd.DataFrame, preds, column: str, extra: dict | None = None) -> pd.DataFrame:
+    out = pd.DataFrame({column: np.round(np.asarray(preds, dtype=np.float64), 2)})
+    for name, values in (extra or {}).items():
+        out[name] = np.asarray(values)
+    if ID in df.columns:
+        out.insert(0, ID, df[ID].to_numpy())
+    return out
+
+
+class Writer:
+    """Serialize result chunks in the request's format; `write` returns bytes to send."""
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self._first = True
+        self._buf = io.BytesIO()
+        self._arrow = None
+
+    def write(self, out: pd.DataFrame) -> bytes:
+        first, self._first = self._first, False
+        if self.fmt == CSV:
+            return out.to_csv(index=False, header=first).encode()
+        if self.fmt == NDJSON:
+            return out.to_json(orient="records", lines=True).encode()
+        import pyarrow as pa
+        table = pa.Table.from_pandas(out, preserve_index=False)
+        if self._arrow is None:
+            self._arrow = pa.ipc.new_stream(self._buf, table.schema)
+        self._arrow.write_table(table)
+        return self._drain()
+
+    def close(self) -> bytes:
+        if self._arrow is None:
+            return b""
+        self._arrow.close()
+        return self._drain()
+
+    def error(self, message: str) -> bytes:
+        """Trailer for a chunk that failed after the response started (CSV/NDJSON)."""
+        if self.fmt == NDJSON:
+            return pd.Series({"error": message}).to_json().encode() + b"\n"
+        if self.fmt == CSV:
+            return f"# error: {message}\n".encode()
+        return b""
+
+    def _drain(self) -> bytes:
+        data = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return data
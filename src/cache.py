@@ -0,0 +1,97 @@
+"""Bounded LRU/TTL cache for single-listing predictions.
+
+Keys are a canonical form of the feature dict (sorted names, numbers as
+floats rounded to `decimals`, so `1` and `1.0` match). Every entry belongs to
+one model version; asking with a different version empties the cache.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import numbers
+import os
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+
+def model_version(meta: dict, path=None) -> str | None:
+    """`created` timestamp from the model's `.meta.json`, else a hash of its content;
+    without meta, the model file's (mtime_ns, size), so a swapped file is a new version."""
+    if not meta:
+        try:
+            st = os.stat(path) if path is not None else None
+        except OSError:
+            st = None
+        return None if st is None else f"file-{st.st_mtime_ns:x}-{st.st_size:x}"
+    if meta.get("created"):
+        return str(meta["created"])
+    blob = json.dumps(meta, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()[:12]
+
+
+class PredictionCache:
+    def __init__(self, max_size: int = 10_000, ttl_s: float | None = None, decimals: int = 6):
+        self.max_size = int(max_size)
+        self.ttl_s = ttl_s
+        self.decimals = int(decimals)
+        self.version: str | None = None
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        self._data: OrderedDict[tuple, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, row: dict) -> tuple:
+        out = []
+        for k in sorted(row):
+            v = row[k]
+            if isinstance(v, numbers.Real) and not isinstance(v, bool):
+                v = round(float(v), self.decimals) + 0.0   # + 0.0 folds -0.0 into 0.0
+            out.append((k, v))
+        return tuple(out)
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self.version = version
+
+    def get(self, row: dict, version) -> float | None:
+        k = self.key(row)
+        with self._lock:
+            self._check_version(version)
+            item = self._data.get(k)
+            if item is not None and self.ttl_s is not None and item[1] < monotonic():
+                del self._data[k]
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(k)
+            self.hits += 1
+            return item[0]
+
+    def put(self, row: dict, version, value: float):
+        if self.max_size <= 0:
+            return
+        k = self.key(row)
+        expires = monotonic() + self.ttl_s if self.ttl_s is not None else float("inf")
+        with self._lock:
+            self._check_version(version)
+            self._data[k] = (float(value), expires)
+            self._data.move_to_end(k)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data), "max_size": self.max_size, "ttl_s": self.ttl_s,
+                "model_version": self.version, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions, "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
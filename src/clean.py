@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 import argparse
+import glob
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from time import perf_counter
+from typing import Iterable, Iterator
 import numpy as np
 import pandas as pd
 
+from src import profiling
+from src.profiling import peak_rss_mb
 
 # ---------- helpers from notebook ----------
 
@@ -44,6 +54,70 @@ def simple_bath(x) -> float:
         return np.nan
 
 
+# ---------- vectorized versions ----------
+# Raw dumps repeat the same price/bathroom strings many times, so both parsers
+# work on the unique values with pandas string ops and broadcast back with
+# NumPy. Anything outside the plain-number shape falls back to the scalar
+# helper, which keeps the results identical to `.apply(to_euro)` etc.
+
+_PLAIN_NUMBER = r"^(?:[0-9]+\.?[0-9]*|\.[0-9]+)$"
+
+
+def _map_uniques(s: pd.Series, parse) -> pd.Series:
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    values = np.append(parse(pd.Series(uniques, dtype=object)), np.nan)
+    return pd.Series(values[codes], index=s.index, dtype=float, name=s.name)
+
+
+def _parse_plain(s: pd.Series, raw: pd.Series, scalar, fallback=None) -> np.ndarray:
+    plain = s.str.fullmatch(_PLAIN_NUMBER).fillna(False).to_numpy(dtype=bool)
+    out = np.full(len(s), np.nan)
+    out[plain] = s[plain].astype(float).to_numpy()
+    rest = ~plain if fallback is None else np.asarray(fallback, dtype=bool)
+    if rest.any():
+        out[rest] = [scalar(x) for x in raw[rest]]
+    return out
+
+
+def _to_euro_uniques(raw: pd.Series) -> np.ndarray:
+    s = (raw.astype(str)
+         .str.replace("\xa0", "", regex=False)
+         .str.replace("€", "", regex=False)
+         .str.replace("$", "", regex=False)
+         .str.strip())
+    has_comma = s.str.contains(",", regex=False)
+    has_dot = s.str.contains(".", regex=False)
+    both = has_comma & has_dot                       # 1.234,56 -> 1234.56
+    s[both] = s[both].str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    comma = has_comma & ~has_dot                     # 1,234 -> 1234
+    s[comma] = s[comma].str.replace(",", "", regex=False)
+    thousands = ~has_comma & s.str.contains(r"\.[^.]{3}$")  # 1.234 -> 1234
+    s[thousands] = s[thousands].str.replace(".", "", regex=False)
+    return _parse_plain(s, raw, to_euro)
+
+
+def _simple_bath_uniques(raw: pd.Series) -> np.ndarray:
+    s = raw.astype(str).str.lower().str.replace(",", ".", regex=False)
+    # str.isdigit() also accepts e.g. superscripts, so non-ASCII goes to the scalar path;
+    # for ASCII anything that is not a plain number fails float() there as well
+    ascii_ = s.str.isascii()
+    half = ascii_ & s.str.contains("half", regex=False) & ~s.str.contains(r"[0-9]")
+    run = s.str.extract(r"([0-9.]+)", expand=False)
+    out = _parse_plain(run, raw, simple_bath, fallback=~ascii_.to_numpy(dtype=bool))
+    out[half.to_numpy(dtype=bool)] = 0.5
+    return out
+
+
+def to_euro_series(s: pd.Series) -> pd.Series:
+    """Vectorized `to_euro` for a whole column."""
+    return _map_uniques(s, _to_euro_uniques)
+
+
+def simple_bath_series(s: pd.Series) -> pd.Series:
+    """Vectorized `simple_bath` for a whole column."""
+    return _map_uniques(s, _simple_bath_uniques)
+
+
 def pick_neighbourhood_col(df: pd.DataFrame) -> str | None:
     if "neighbourhood_cleansed" in df.columns:
         return "neighbourhood_cleansed"
@@ -59,73 +133,364 @@ FEATURE_CANDIDATES = [
     "minimum_nights", "number_of_reviews", "reviews_per_month", "availability_365"
 ]
 TARGET = "price"
+ID = "id"   # listing id, kept in the output when the dump has it
 
 
-def prepare_features(df: pd.DataFrame) -> pd.DataFrame:
+def raw_columns(header: Iterable[str]) -> list[str]:
+    """Columns of a raw dump that `prepare_features` actually reads, in file order."""
+    header = list(header)
+    wanted = {ID, TARGET, *FEATURE_CANDIDATES} - {"neighbourhood", "bathrooms_num"}
+    # same precedence as prepare_features: the unused fallback column is skipped
+    wanted.add("neighbourhood_cleansed" if "neighbourhood_cleansed" in header else "neighbourhood")
+    wanted.add("bathrooms" if "bathrooms" in header else "bathrooms_text")
+    return [c for c in header if c in wanted]
+
+
+NUMERIC_RAW = ["accommodates", "bedrooms", "minimum_nights",
+               "number_of_reviews", "reviews_per_month", "availability_365"]
+
+
+def _downcast_int(s: pd.Series) -> pd.Series:
+    # never below int32: feature arithmetic on int8/int16 columns wraps around silently
+    s = pd.to_numeric(s, downcast="integer")
+    return s.astype(np.int32) if s.dtype.itemsize < 4 else s
+
+
+def _compact(s: pd.Series) -> pd.Series:
+    """Smallest exact dtype for `s`: integers (at least int32) for whole numbers,
+    float32 only where it round-trips (so `1.5` shrinks but `0.3` stays float64)."""
+    if s.dtype.kind not in "iuf":
+        return s
+    arr = s.to_numpy()
+    if arr.dtype.kind == "f":
+        if len(arr) and np.isfinite(arr).all() and (arr == np.trunc(arr)).all():
+            return _downcast_int(s)
+        return s.astype(np.float32) if np.array_equal(arr.astype(np.float32), arr) else s
+    return _downcast_int(s)
+
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    # Only the needed columns are converted (never a copy of the whole raw frame),
+    # rows are filtered once per column and every column gets its smallest exact dtype
+    # (integers no narrower than int32).
     # price -> numeric euros
     if "price" not in df.columns:
         raise KeyError("Column 'price' not found in input data.")
-    df = df.copy()
-    df["price"] = df["price"].apply(to_euro)
+    data = {}
+    if ID in df.columns:
+        data[ID] = df[ID]
 
-    # neighbourhood column -> 'neighbourhood'
+    # categoricals
+    if "room_type" in df.columns:
+        data["room_type"] = df["room_type"].astype("category")
+    # neighbourhood column -> 'neighbourhood'; all missing (later dropped) if the
+    # snapshot has none
     nbh = pick_neighbourhood_col(df)
-    if nbh and nbh != "neighbourhood":
-        df["neighbourhood"] = df[nbh]
-    elif nbh is None:
-        # no neighbourhood in this snapshot; keep missing column to later drop
-        df["neighbourhood"] = np.nan
+    data["neighbourhood"] = (df[nbh] if nbh else pd.Series(np.nan, index=df.index)
+                             ).astype("category")
+
+    # ensure typical numeric cols are numeric
+    for c in NUMERIC_RAW:
+        if c in df.columns:
+            data[c] = pd.to_numeric(df[c], errors="coerce")
 
     # bathrooms_num from best available source
     if "bathrooms" in df.columns:
-        df["bathrooms_num"] = pd.to_numeric(df["bathrooms"], errors="coerce")
+        data["bathrooms_num"] = pd.to_numeric(df["bathrooms"], errors="coerce")
     elif "bathrooms_text" in df.columns:
-        df["bathrooms_num"] = df["bathrooms_text"].apply(simple_bath)
+        data["bathrooms_num"] = simple_bath_series(df["bathrooms_text"])
     else:
-        df["bathrooms_num"] = np.nan
+        data["bathrooms_num"] = pd.Series(np.nan, index=df.index)
+    data[TARGET] = to_euro_series(df["price"])
 
-    # cast categoricals (optional)
-    if "room_type" in df.columns:
-        df["room_type"] = df["room_type"].astype("category")
-    if "neighbourhood" in df.columns:
-        df["neighbourhood"] = df["neighbourhood"].astype("category")
+    # pick available features; drop rows with any missing value
+    features = [c for c in FEATURE_CANDIDATES if c in data]
+    cols = ([ID] if ID in data else []) + features + [TARGET]
+    keep = np.ones(len(df), dtype=bool)
+    for c in cols:
+        keep &= data[c].notna().to_numpy()
+    if keep.all():
+        return pd.DataFrame({c: _compact(data[c]) for c in cols}, index=df.index)
+    return pd.DataFrame({c: _compact(data[c][keep]) for c in cols}, index=df.index[keep])
 
-    # ensure typical numeric cols are numeric
-    for c in ["accommodates", "bedrooms", "minimum_nights",
-              "number_of_reviews", "reviews_per_month", "availability_365"]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    # pick available features
-    features = [c for c in FEATURE_CANDIDATES if c in df.columns]
-    cols = features + [TARGET]
-    out = df[cols].dropna()
+def prepare_features(df: pd.DataFrame) -> pd.DataFrame:
+    out = _prepare(df)
     if len(out) == 0:
         raise ValueError("No rows left after dropna(). Check input columns.")
     return out
 
 
+def iter_clean_chunks(inp, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Read only the needed raw columns `chunksize` rows at a time and clean each chunk."""
+    usecols = raw_columns(pd.read_csv(inp, nrows=0).columns)
+    reader = pd.read_csv(inp, usecols=usecols, chunksize=chunksize, low_memory=False)
+    for chunk in profiling.iterate("load", reader):
+        with profiling.stage("clean"):
+            out = _prepare(chunk)
+        yield out
+
+
+# ---------- output ----------
+# Written tables use one fixed schema (categoricals as strings, id as int64,
+# other numerics as float64) so the result does not depend on how the input
+# was chunked.
+
+CATEGORICAL_OUT = ["room_type", "neighbourhood"]
+TAGS = ["city", "snapshot"]   # added when several snapshots are cleaned together
+
+
+def _output_dtype(col: str):
+    if col in CATEGORICAL_OUT or col in TAGS:
+        return "str"
+    return "int64" if col == ID else "float64"
+
+
+def _output_frame(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({c: _output_dtype(c) for c in df.columns})
+
+
+def iter_table_chunks(path, chunksize: int, columns: list[str] | None = None
+                      ) -> Iterator[pd.DataFrame]:
+    """Read a cleaned CSV or Parquet table `chunksize` rows at a time."""
+    path = Path(path)
+    if path.suffix in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def write_chunks(chunks: Iterable[pd.DataFrame], out: Path) -> int:
+    """Append cleaned chunks to a CSV or Parquet (by suffix) file; returns rows written."""
+    out = Path(out)
+    parquet = out.suffix in (".parquet", ".pq")
+    writer = None
+    n = 0
+    try:
+        for i, chunk in enumerate(chunks):
+            chunk = _output_frame(chunk)
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                if writer is None:
+                    types = {"str": pa.string(), "int64": pa.int64(), "float64": pa.float64()}
+                    schema = pa.schema([(c, types[_output_dtype(c)]) for c in chunk.columns])
+                    writer = pq.ParquetWriter(out, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema,
+                                                        preserve_index=False))
+            else:
+                chunk.to_csv(out, index=False, mode="w" if i == 0 else "a", header=i == 0)
+            n += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n
+
+
+# ---------- many snapshots ----------
+# Every input file is cleaned (streamed, in chunks) into a Parquet part by a pool
+# worker. The parts are then merged newest snapshot first: a row is written unless
+# its (city, id) was already written, so each listing keeps its latest snapshot and
+# only the ids seen so far are held in memory, not the files.
+
+_DATE = re.compile(r"(\d{4})-(\d{2})(?:-(\d{2}))?")
+
+
+class Snapshot:
+    def __init__(self, path, city: str | None = None, snapshot: str | None = None):
+        self.path = Path(path)
+        self.city = city or guess_city(self.path)
+        self.snapshot = snapshot or guess_snapshot(self.path)
+
+
+def guess_snapshot(path: Path) -> str:
+    """Date in the path (InsideAirbnb: `<city>/<YYYY-MM-DD>/listings.csv.gz`), else mtime."""
+    for part in reversed(path.parts):
+        m = _DATE.search(part)
+        if m:
+            return "-".join(g for g in m.groups() if g)
+    return pd.Timestamp(path.stat().st_mtime, unit="s").strftime("%Y-%m-%d")
+
+
+def guess_city(path: Path, default: str = "berlin") -> str:
+    """Directory above the date directory (`<city>/<date>/...`), else `default`."""
+    parts = path.parts[:-1]
+    for i, part in enumerate(parts):
+        if _DATE.fullmatch(part) and i > 0:
+            return parts[i - 1].lower()
+    return default
+
+
+def find_inputs(patterns: list[str], manifest=None, city: str | None = None) -> list[Snapshot]:
+    """Snapshots from paths/globs, or from a manifest CSV (`path[,city][,snapshot]`)."""
+    if manifest is not None:
+        m = pd.read_csv(manifest, dtype=str)
+        base = Path(manifest).parent
+        return [Snapshot(base / r["path"], r.get("city") or city, r.get("snapshot"))
+                for r in m.where(m.notna(), None).to_dict("records")]
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) \
+            else [pattern]
+        paths.extend(matches)
+    if not paths:
+        raise FileNotFoundError(f"No input files match {patterns}")
+    return [Snapshot(p, city) for p in dict.fromkeys(paths)]
+
+
+def clean_snapshot(snap: Snapshot, part: Path, chunksize: int) -> dict:
+    """Clean one file into a tagged Parquet part (runs in a pool worker)."""
+    t0 = perf_counter()
+
+    def tagged():
+        for chunk in iter_clean_chunks(snap.path, chunksize):
+            yield chunk.assign(city=snap.city, snapshot=snap.snapshot)
+
+    rows = write_chunks(tagged(), part)
+    return {"path": str(snap.path), "city": snap.city, "snapshot": snap.snapshot,
+            "part": str(part) if rows else None, "rows": rows,
+            "seconds": perf_counter() - t0, "peak_rss_mb": peak_rss_mb()}
+
+
+def _isin_sorted(values: np.ndarray, sorted_arr: np.ndarray) -> np.ndarray:
+    """`np.isin(values, sorted_arr)` by binary search, without re-sorting `sorted_arr`."""
+    if not len(sorted_arr):
+        return np.zeros(len(values), dtype=bool)
+    pos = np.searchsorted(sorted_arr, values).clip(max=len(sorted_arr) - 1)
+    return sorted_arr[pos] == values
+
+
+def merge_latest(parts: list[dict], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Stream parts newest first, dropping (city, id) pairs already yielded.
+
+    The ids seen per city are kept sorted; each chunk is looked up by binary
+    search and its new ids are inserted in place, so the set is never re-sorted.
+    """
+    seen: dict[str, np.ndarray] = {}
+    for info in sorted(parts, key=lambda p: p["snapshot"], reverse=True):
+        if info["part"] is None:
+            continue
+        for chunk in profiling.iterate("load", iter_table_chunks(info["part"], chunksize)):
+            if ID not in chunk.columns:
+                yield chunk   # nothing to deduplicate on
+                continue
+            ids = chunk[ID].to_numpy()
+            done = seen.get(info["city"], np.empty(0, dtype=ids.dtype))
+            keep = ~_isin_sorted(ids, done) & ~chunk[ID].duplicated().to_numpy()
+            new = np.sort(ids[keep])
+            done = done.astype(np.result_type(done, new), copy=False)   # int ids vs float
+            seen[info["city"]] = np.insert(done, np.searchsorted(done, new), new)
+            yield chunk[keep]
+
+
+def clean_many(snapshots: list[Snapshot], out: Path, workers: int = 1,
+               chunksize: int = 50_000, dedup: bool = True) -> dict:
+    """Clean `snapshots` in parallel into one table at `out`; returns run statistics."""
+    t0 = perf_counter()
+    tmp = Path(tempfile.mkdtemp(prefix="clean_parts_", dir=Path(out).parent))
+    try:
+        jobs = [(s, tmp / f"part{i:05d}.parquet", chunksize) for i, s in enumerate(snapshots)]
+        if workers <= 1:
+            parts = [clean_snapshot(*job) for job in jobs]
+        else:
+            with profiling.stage("clean"), \
+                    ProcessPoolExecutor(workers, initializer=profiling.reset) as pool:
+                parts = list(pool.map(clean_snapshot, *zip(*jobs)))
+        t_clean = perf_counter() - t0
+        merged = merge_latest(parts, chunksize) if dedup else (
+            chunk for p in parts if p["part"] for chunk in iter_table_chunks(p["part"], chunksize))
+        with profiling.stage("write"):
+            n = write_chunks(merged, out)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    secs = perf_counter() - t0
+    worker_rss = [p["peak_rss_mb"] for p in parts if p["peak_rss_mb"] is not None]
+    return {"files": len(parts), "rows_cleaned": sum(p["rows"] for p in parts),
+            "rows_out": n, "duplicates_dropped": sum(p["rows"] for p in parts) - n,
+            "clean_seconds": t_clean, "merge_seconds": secs - t_clean, "seconds": secs,
+            "files_per_minute": len(parts) / max(secs, 1e-9) * 60,
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_worker_rss_mb": max(worker_rss) if worker_rss else None,
+            "per_file": parts}
+
+
 # ---------- CLI ----------
 
 def main():
     p = argparse.ArgumentParser(
         description="Clean InsideAirbnb listing data and export a compact feature table.")
-    p.add_argument("--in", dest="inp", required=True,
-                   help="Path to raw listings CSV/CSV.GZ (project root)")
+    p.add_argument("--in", dest="inp", nargs="+",
+                   help="Raw listings CSV/CSV.GZ; several paths or globs (quoted, e.g. "
+                        "'data/*/*/listings.csv.gz') clean many snapshots into one table")
+    p.add_argument("--manifest", default=None,
+                   help="CSV of inputs instead of --in: path[,city][,snapshot]")
     p.add_argument("--out", dest="out", required=True,
-                   help="Output CSV path for cleaned features")
+                   help="Output path for cleaned features (.csv, or .parquet)")
+    p.add_argument("--chunksize", type=int, default=None,
+                   help="Stream the input in chunks of this many rows (bounded memory)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                   help="Processes cleaning snapshots in parallel (several inputs)")
+    p.add_argument("--city", default=None,
+                   help="City tag when the path does not say (<city>/<date>/...); default berlin")
+    p.add_argument("--keep-duplicates", action="store_true",
+                   help="Keep every snapshot's row instead of the latest per (city, id)")
+    profiling.add_argument(p)
     args = p.parse_args()
+    if not args.inp and not args.manifest:
+        p.error("one of --in or --manifest is required")
+
+    profiling.start("clean", args.profile)
+    try:
+        _run(args)
+    finally:
+        profiling.finish()
 
-    inp = Path(args.inp)
+
+def _run(args):
     out = Path(args.out)
     out.parent.mkdir(parents=True, exist_ok=True)
 
+    if args.manifest or len(args.inp) > 1 or glob.has_magic(args.inp[0]):
+        snaps = find_inputs(args.inp or [], args.manifest, args.city)
+        print(f"Cleaning {len(snaps)} snapshot(s) with {args.workers} worker(s) ...")
+        stats = clean_many(snaps, out, args.workers, args.chunksize or 50_000,
+                           dedup=not args.keep_duplicates)
+        if stats["rows_out"] == 0:
+            raise ValueError("No rows left after dropna(). Check input columns.")
+        for f in stats["per_file"]:
+            print(f"  {f['city']} {f['snapshot']}: {f['rows']} rows in {f['seconds']:.1f}s "
+                  f"({f['path']})")
+        rss = "" if stats["peak_rss_mb"] is None else (
+            f" | peak RSS {stats['peak_rss_mb']:.0f} MB (main), "
+            f"{stats['peak_worker_rss_mb']:.0f} MB (worker)")
+        print(f"Saved {out} | Rows: {stats['rows_out']} ({stats['duplicates_dropped']} older "
+              f"duplicates dropped) | {stats['files_per_minute']:.1f} files/min, "
+              f"{stats['seconds']:.1f}s{rss}")
+        return
+
+    inp = Path(args.inp[0])
+
+    if args.chunksize:
+        print(f"Streaming {inp} in chunks of {args.chunksize} rows ...")
+        with profiling.stage("write"):
+            n = write_chunks(iter_clean_chunks(inp, args.chunksize), out)
+        if n == 0:
+            raise ValueError("No rows left after dropna(). Check input columns.")
+        print(f"Saved {out} | Rows: {n}")
+        return
+
     print(f"Loading {inp} ...")
-    df = pd.read_csv(inp, low_memory=False)
+    with profiling.stage("load"):
+        usecols = raw_columns(pd.read_csv(inp, nrows=0).columns)
+        df = pd.read_csv(inp, usecols=usecols, low_memory=False)
     print("Raw shape:", df.shape)
 
-    clean = prepare_features(df)
-    clean.to_csv(out, index=False)
+    with profiling.stage("clean"):
+        clean = prepare_features(df)
+    with profiling.stage("write"):
+        write_chunks([clean], out)
     print(f"Saved {out} | Shape: {clean.shape}")
     print("Columns:", list(clean.columns))
 
@@ -0,0 +1,233 @@
+"""Incremental refresh: clean only changed listings, retrain only when it matters.
+
+A persistent feature store (Parquet) holds one cleaned row per listing `id`
+plus a hash of the raw columns it was cleaned from. For a new snapshot only
+rows whose id is new or whose hash changed are run through `clean._prepare`;
+delisted ids are dropped. Rows that do not survive cleaning are kept with
+empty features so they are not re-cleaned every month.
+
+The model is retrained when the changed share of the store reaches
+`--min-change` (or there is no model yet). A RandomForest is warm-started:
+the fitted preprocessor is kept and `--add-trees` trees are added on the
+current data, up to `--max-trees`, after which it is rebuilt. Histogram
+gradient boosting is always rebuilt: `fit` re-bins the new data before it
+reaches the warm-start branch, so the existing trees' bin-index thresholds
+would no longer match.
+Hold-out rows are chosen by listing id, so they stay out of training across
+snapshots.
+
+    python -m src.incremental --in data/listings.csv.gz --store data/feature_store.parquet \
+        --model models/baseline.joblib
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from src.clean import ID, TARGET, _output_frame, _prepare, raw_columns
+from src.models.train import ENGINES, FEATURES, make_pipeline, save_model
+
+HASH = "row_hash"
+VALID_EVERY = 5   # ids with id % 5 == 0 are the hold-out set (20%)
+
+
+# ---------- feature store ----------
+
+def read_snapshot(inp) -> pd.DataFrame:
+    """Raw columns of a snapshot as strings, so hashes do not depend on inferred dtypes."""
+    usecols = raw_columns(pd.read_csv(inp, nrows=0).columns)
+    if ID not in usecols:
+        raise KeyError(f"Column '{ID}' is required for incremental updates.")
+    raw = pd.read_csv(inp, usecols=usecols, dtype=str, low_memory=False)
+    raw[ID] = pd.to_numeric(raw[ID], errors="coerce")
+    raw = raw.dropna(subset=[ID]).astype({ID: "int64"})
+    return raw.drop_duplicates(ID, keep="last").reset_index(drop=True)
+
+
+def row_hashes(raw: pd.DataFrame) -> np.ndarray:
+    cols = sorted(c for c in raw.columns if c != ID)
+    return pd.util.hash_pandas_object(raw[cols], index=False).to_numpy()
+
+
+def load_store(path) -> pd.DataFrame | None:
+    path = Path(path)
+    return pd.read_parquet(path) if path.is_file() else None
+
+
+def save_store(store: pd.DataFrame, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    store.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def update_store(raw: pd.DataFrame, store: pd.DataFrame | None):
+    """Merge a snapshot into the store; returns (new store, stats)."""
+    t0 = perf_counter()
+    hashes = row_hashes(raw)
+    if store is None or store.empty:
+        old = pd.Series(dtype="uint64")
+    else:
+        old = store.set_index(ID)[HASH]
+    known = raw[ID].isin(old.index).to_numpy()
+    same = known.copy()
+    same[known] = old.reindex(raw.loc[known, ID]).to_numpy() == hashes[known]
+
+    changed = raw[~same]
+    t_clean = perf_counter()
+    if len(changed):
+        cleaned = _output_frame(_prepare(changed))
+    else:
+        cleaned = pd.DataFrame(columns=[ID])
+    t_clean = perf_counter() - t_clean
+    rows = pd.DataFrame({ID: changed[ID].to_numpy(), HASH: hashes[~same]})
+    rows = rows.merge(cleaned, on=ID, how="left")
+
+    kept = store[store[ID].isin(raw.loc[same, ID])] if store is not None else rows.iloc[:0]
+    new_store = pd.concat([kept, rows], ignore_index=True) if len(kept) else rows
+    stats = {"snapshot_rows": int(len(raw)), "unchanged": int(same.sum()),
+             "new": int((~known).sum()), "updated": int((known & ~same).sum()),
+             "removed": int(len(old) - known.sum()),
+             "reprocessed": int(len(changed)), "clean_seconds": t_clean,
+             "update_seconds": perf_counter() - t0}
+    n_changed = stats["new"] + stats["updated"] + stats["removed"]
+    stats["changed_share"] = n_changed / len(old) if len(old) else 1.0
+    return new_store, stats
+
+
+# ---------- retraining ----------
+
+def _grow_param(model) -> str | None:
+    # Only forests: a warm-started HistGradientBoostingRegressor refits its
+    # bin mapper on the new data, which silently shifts the existing trees.
+    if hasattr(model, "n_estimators") and hasattr(model, "warm_start"):
+        return "n_estimators"
+    return None
+
+
+def _fitted_size(model) -> int | None:
+    if hasattr(model, "n_iter_"):    # boosting may stop early, below max_iter
+        return int(model.n_iter_)
+    return len(model.estimators_) if hasattr(model, "estimators_") else None
+
+
+def retrain(store: pd.DataFrame, model_path, engine: str = "rf", add_trees: int = 50,
+            max_trees: int = 600, full: bool = False):
+    """Warm-start the saved model on the store, or fit a new one; returns (pipe, metrics, info)."""
+    data = store.dropna(subset=FEATURES + [TARGET])
+    valid = (data[ID] % VALID_EVERY == 0).to_numpy()
+    X_tr, y_tr = data.loc[~valid, FEATURES], data.loc[~valid, TARGET].to_numpy()
+    X_va, y_va = data.loc[valid, FEATURES], data.loc[valid, TARGET].to_numpy()
+
+    pipe, param, before = None, None, None
+    model_path = Path(model_path)
+    if not full and model_path.is_file():
+        pipe = joblib.load(model_path)
+        param = _grow_param(pipe.named_steps["model"])
+        before = _fitted_size(pipe.named_steps["model"])
+        if param is None or before is None or before + add_trees > max_trees:
+            pipe = None
+
+    t0 = perf_counter()
+    if pipe is not None:
+        model = pipe.named_steps["model"]
+        model.set_params(warm_start=True, **{param: before + add_trees})
+        model.fit(pipe.named_steps["prep"].transform(X_tr), y_tr)
+        mode = "warm_start"
+    else:
+        pipe = make_pipeline(engine)
+        pipe.fit(X_tr, y_tr)
+        mode, before = "full", 0
+    fit_s = perf_counter() - t0
+
+    pred = pipe.predict(X_va)
+    metrics = {"mae": float(mean_absolute_error(y_va, pred)),
+               "rmse": float(np.sqrt(mean_squared_error(y_va, pred))),
+               "r2": float(r2_score(y_va, pred)),
+               "n_train": int(len(y_tr)), "n_valid": int(len(y_va))}
+    size = _fitted_size(pipe.named_steps["model"])
+    info = {"mode": mode, "fit_seconds": fit_s, "size": size,
+            "added": None if size is None else size - before}
+    return pipe, metrics, info
+
+
+def _saved_vs_full(stats: dict, info: dict | None, ref: dict) -> float | None:
+    """Seconds saved against a full rebuild, using the rates of the last full run."""
+    if not ref:
+        return None
+    full = ref["clean_s_per_row"] * stats["snapshot_rows"]
+    spent = stats["clean_seconds"]
+    if info is not None:
+        full += ref["fit_seconds"]
+        spent += info["fit_seconds"]
+    return full - spent
+
+
+def main():
+    p = argparse.ArgumentParser(description="Refresh the feature store and model from a snapshot.")
+    p.add_argument("--in", dest="inp", required=True, help="Raw listings CSV/CSV.GZ")
+    p.add_argument("--store", default="data/feature_store.parquet")
+    p.add_argument("--model", default="models/baseline.joblib")
+    p.add_argument("--engine", choices=ENGINES, default=None,
+                   help="Engine for a full (re)build (default: the saved model's, else rf)")
+    p.add_argument("--min-change", type=float, default=0.05,
+                   help="Retrain when at least this share of listings changed")
+    p.add_argument("--add-trees", type=int, default=50)
+    p.add_argument("--max-trees", type=int, default=600,
+                   help="Rebuild from scratch instead of growing past this size")
+    p.add_argument("--full", action="store_true", help="Always rebuild the model from scratch")
+    args = p.parse_args()
+
+    model = Path(args.model)
+    meta_path = model.with_suffix(model.suffix + ".meta.json")
+    prev = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.is_file() else {}
+    ref = dict(prev.get("incremental", {}).get("full_rebuild", {}))
+    engine = args.engine or prev.get("engine", "rf")
+
+    raw = read_snapshot(args.inp)
+    store, stats = update_store(raw, None if args.full else load_store(args.store))
+    save_store(store, args.store)
+    print(f"Snapshot: {stats['snapshot_rows']} listings | {stats['new']} new, "
+          f"{stats['updated']} updated, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed ({stats['changed_share']:.1%} changed)")
+    print(f"Cleaned {stats['reprocessed']}/{stats['snapshot_rows']} rows "
+          f"in {stats['clean_seconds']:.2f}s")
+    if stats["reprocessed"] == stats["snapshot_rows"] and stats["snapshot_rows"]:
+        ref["clean_s_per_row"] = stats["clean_seconds"] / stats["snapshot_rows"]
+
+    info = None
+    if model.is_file() and not args.full and stats["changed_share"] < args.min_change:
+        print(f"Changed share below {args.min_change:.0%}: keeping {model}")
+    else:
+        pipe, metrics, info = retrain(store, model, engine, args.add_trees,
+                                      args.max_trees, args.full)
+        print(f"{info['mode']} fit in {info['fit_seconds']:.1f}s "
+              f"(+{info['added']} -> {info['size']} trees/iterations) | Metrics: {metrics}")
+        if info["mode"] == "full":
+            ref["fit_seconds"] = info["fit_seconds"]
+
+    saved = _saved_vs_full(stats, info, ref) if len(ref) == 2 else None
+    if saved is not None:
+        print(f"Time saved vs a full rebuild: ~{saved:.1f}s (rates of the last full run)")
+    if info is None:
+        return
+
+    if info["mode"] == "warm_start":
+        engine = prev.get("engine", engine)
+    save_model(pipe, model, {"metrics": metrics, "engine": engine,
+                             "incremental": {**stats, **info, "snapshot": str(args.inp),
+                                             "seconds_saved": saved, "full_rebuild": ref}})
+    print(f"Saved model to {model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Background batch-scoring jobs for the API.
+
+A job scores one listings file (CSV, CSV.gz or Parquet) with the offline
+export path (`src.export_to_excel.score_file`: same cleaning, chunked) in a
+local process pool and writes `result.parquet` next to its status. Workers
+are spawned (the API process has threads), run at a lower CPU priority
+(`nice`) and keep the last model they loaded, so jobs do not compete with
+interactive `/predict` calls for the event loop or the CPU.
+
+Each job lives in `<jobs_dir>/<id>/`: `status.json` is written by the
+worker after every chunk (state, rows, progress) and read back on poll.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+STATUS_FILE = "status.json"
+RESULT_FILE = "result.parquet"
+INPUT_SUFFIXES = (".csv", ".csv.gz", ".parquet", ".pq")
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def write_status(job_dir: Path, **fields) -> dict:
+    """Merge `fields` into the job's status file (atomically replaced)."""
+    path = Path(job_dir) / STATUS_FILE
+    status = read_status(job_dir) or {}
+    status.update(fields)
+    tmp = path.with_name(f"{STATUS_FILE}.tmp{os.getpid()}")
+    tmp.write_text(json.dumps(status, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return status
+
+
+def read_status(job_dir: Path) -> dict | None:
+    try:
+        return json.loads((Path(job_dir) / STATUS_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+# ---------- worker side ----------
+
+def _init_job_worker(nice: int):
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+def run_job(job_dir, inp, model_path, meta_path, chunksize: int,
+            engine: str = "sklearn") -> dict:
+    """Score `inp` into `<job_dir>/result.parquet`; runs inside a pool worker."""
+    from src.clean import write_chunks
+    from src.export_to_excel import score_file
+
+    job_dir = Path(job_dir)
+    t0 = perf_counter()
+    write_status(job_dir, state="running", started=_now())
+    rows = 0
+
+    def counted(chunks):
+        nonlocal rows
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+
+    def progress(fraction):
+        write_status(job_dir, rows=rows, progress=round(fraction, 4))
+
+    out = job_dir / RESULT_FILE
+    tmp = job_dir / f"part.{RESULT_FILE}"   # suffix picks the format in write_chunks
+    try:
+        n = write_chunks(counted(score_file(inp, model_path, meta_path, chunksize,
+                                            engine=engine, progress=progress)), tmp)
+        os.replace(tmp, out)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        return write_status(job_dir, state="failed", finished=_now(),
+                            error=f"{type(e).__name__}: {e}",
+                            traceback=traceback.format_exc(limit=5))
+    return write_status(job_dir, state="done", finished=_now(), rows=n, progress=1.0,
+                        seconds=round(perf_counter() - t0, 3))
+
+
+# ---------- API side ----------
+
+class JobManager:
+    """Submit, track and list scoring jobs; the process pool starts with the first job."""
+
+    def __init__(self, jobs_dir="outputs/jobs", workers: int = 1, chunksize: int = 50_000,
+                 nice: int = 10, engine: str = "sklearn"):
+        self.jobs_dir = Path(jobs_dir)
+        self.workers = max(int(workers), 1)
+        self.chunksize = int(chunksize)
+        self.nice = int(nice)
+        self.engine = engine
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: forking a process that runs threads can deadlock
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_job_worker, initargs=(self.nice,))
+            return self._pool
+
+    def new_job_dir(self) -> tuple[str, Path]:
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.jobs_dir / job_id
+        job_dir.mkdir(parents=True)
+        return job_id, job_dir
+
+    def submit(self, inp, model_path, meta_path, job_id: str | None = None, **info) -> dict:
+        """Queue a job for `inp`; pass `job_id` from `new_job_dir` to reuse its directory."""
+        if job_id is None:
+            job_id, job_dir = self.new_job_dir()
+        else:
+            job_dir = self.jobs_dir / job_id
+        status = write_status(job_dir, id=job_id, state="queued", submitted=_now(),
+                              input=str(inp), model_path=str(model_path), rows=0,
+                              progress=0.0, **info)
+        fut = self._executor().submit(run_job, str(job_dir), str(inp), str(model_path),
+                                      str(meta_path), self.chunksize, self.engine)
+        fut.add_done_callback(lambda f, d=job_dir: self._finished(d, f))
+        return status
+
+    def _finished(self, job_dir: Path, fut):
+        # the worker writes its own final status; this covers a crashed/cancelled worker
+        if fut.cancelled():
+            write_status(job_dir, state="cancelled", finished=_now())
+        elif fut.exception() is not None:
+            write_status(job_dir, state="failed", finished=_now(), error=repr(fut.exception()))
+
+    def _job_dir(self, job_id: str) -> Path | None:
+        if not job_id.isalnum():
+            return None
+        job_dir = self.jobs_dir / job_id
+        return job_dir if (job_dir / STATUS_FILE).is_file() else None
+
+    def status(self, job_id: str) -> dict | None:
+        job_dir = self._job_dir(job_id)
+        return read_status(job_dir) if job_dir is not None else None
+
+    def result_path(self, job_id: str) -> Path | None:
+        job_dir = self._job_dir(job_id)
+        path = job_dir / RESULT_FILE if job_dir is not None else None
+        return path if path is not None and path.is_file() else None
+
+    def list(self) -> list[dict]:
+        if not self.jobs_dir.is_dir():
+            return []
+        jobs = [read_status(d) for d in self.jobs_dir.iterdir() if (d / STATUS_FILE).is_file()]
+        return sorted((j for j in jobs if j), key=lambda j: j.get("submitted", ""), reverse=True)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,148 @@
+"""Minimal Prometheus metrics (text exposition format 0.0.4) for the API.
+
+Counters, gauges and fixed-bucket histograms are plain dicts behind one lock;
+an observation is a bisect plus a few additions, so instrumenting every
+request costs a few microseconds. `MetricsMiddleware` is a pure ASGI
+middleware that counts requests by route template, method and status and
+times them end to end (including streamed bodies).
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(float(2 ** i) for i in range(17))   # 1 .. 65536 rows
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    esc = (str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, esc)) + "}"
+
+
+def _value(v) -> str:
+    """Sample value at full precision (`:g` keeps 6 digits, so big counters look flat)."""
+    v = float(v)
+    if v != v:
+        return "NaN"
+    if v in (float("inf"), float("-inf")):
+        return "+Inf" if v > 0 else "-Inf"
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.label_names, k)} {_value(v)}"
+                                 for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def replace(self, *labels, value: float = 1.0):
+        """Drop every other label set (e.g. the previous model version) and set this one."""
+        with self._lock:
+            self._values = {labels: float(value)}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._values.items())
+        lines = self._header()
+        names = self.label_names + ("le",)
+        for key, (counts, total, n) in items:
+            cum = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cum += c
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_labels(names, key + (le,))} {cum}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[_Metric] = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for m in self.metrics for line in m.render()) + "\n"
+
+
+class MetricsMiddleware:
+    """Count and time HTTP requests; `scope["state"]["t_start"]` marks when one arrived."""
+
+    def __init__(self, app, requests: Counter, duration: Histogram, skip=("/metrics",)):
+        self.app = app
+        self.requests, self.duration, self.skip = requests, duration, set(skip)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip:
+            await self.app(scope, receive, send)
+            return
+        t0 = perf_counter()
+        scope.setdefault("state", {})["t_start"] = t0
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            self.requests.inc(endpoint, scope["method"], str(status))
+            self.duration.observe(endpoint, value=perf_counter() - t0)
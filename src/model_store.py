@@ -0,0 +1,277 @@
+"""Load, warm up and hot-reload the serving model.
+
+`load_model` prefers the compiled node arrays next to the `.joblib` file and
+opens them with `mmap_mode="r"`, so every uvicorn worker maps the same pages
+instead of holding a private copy of the forest. When they are missing or
+older than the model, the pipeline is compiled once and written there
+for the next worker. Workers serialize on a lock file next to the compiled
+directory, so one of them compiles while the others wait and then map its
+result. `ModelWatcher` polls the files and calls back when they change so
+the app can swap in a new `LoadedModel`.
+
+joblib and pandas are imported on first use: serving a compiled model one
+row at a time needs neither, so the API starts without them.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:   # Windows: no compile lock, readers fall back on errors
+    fcntl = None
+
+from src.cache import model_version
+from src.models.compile import (SPEC_FILE, CompiledPreprocessor, compile_pipeline,
+                                compile_preprocessor, compiled_path_for, load_compiled,
+                                save_compiled)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Typical Berlin listing used to exercise the full predict path at startup
+WARMUP_ROW = {
+    "room_type": "Entire home/apt", "neighbourhood": "Mitte", "accommodates": 2,
+    "bedrooms": 1.0, "bathrooms_num": 1.0, "minimum_nights": 3,
+    "number_of_reviews": 50, "reviews_per_month": 2.0, "availability_365": 150,
+}
+
+
+class LoadedModel:
+    """A model ready to serve: compiled engine and/or sklearn pipeline plus its meta."""
+
+    def __init__(self, path, meta: dict, model=None, engine=None, load_seconds: float = 0.0):
+        self.path = str(path)
+        self.meta = meta
+        self.model = model
+        self.engine = engine
+        self.load_seconds = load_seconds
+        self.warmup_seconds = 0.0
+        self.version = model_version(meta, path)
+        # pandas-free request -> feature matrix path, when the preprocessor compiles
+        self.encoder = engine.prep if engine is not None else row_encoder(model, meta)
+
+    @property
+    def kind(self) -> str:
+        return "compiled" if self.engine is not None else "sklearn"
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint: node arrays (mapped or not) of the compiled
+        engine, else the size of the joblib file (joblib stores arrays uncompressed)."""
+        if self.engine is not None:
+            arrays = [*self.engine.arrays.values(), self.engine.children, self.engine.is_leaf]
+            return int(sum(a.nbytes for a in arrays))
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def predict_rows(self, rows: list[dict], stages: dict | None = None):
+        t0 = perf_counter()
+        if self.encoder is None:
+            import pandas as pd
+            return self._predict(pd.DataFrame(rows), t0, stages)
+        Xt = self.encoder.encode_rows(rows)
+        t1 = perf_counter()
+        if self.engine is not None:
+            preds = self.engine.predict_transformed(Xt.astype(np.float32))
+        else:
+            preds = self.model[-1].predict(Xt)
+        if stages is not None:
+            stages["preprocess"] = t1 - t0
+            stages["model"] = perf_counter() - t1
+        return preds
+
+    def predict_frame(self, X: pd.DataFrame, stages: dict | None = None):
+        return self._predict(X, perf_counter(), stages)
+
+    def _predict(self, X, t0: float, stages: dict | None):
+        """Encode + score; fills `stages` with frame/preprocess/model seconds if given."""
+        t1 = perf_counter()
+        if self.engine is not None:
+            Xt = self.engine.prep.transform(X)
+            t2 = perf_counter()
+            preds = self.engine.predict_transformed(Xt)
+        elif hasattr(self.model, "steps") and len(self.model.steps) > 1:
+            Xt = self.model[:-1].transform(X)
+            t2 = perf_counter()
+            preds = self.model[-1].predict(Xt)
+        else:
+            t2 = t1
+            preds = self.model.predict(X)
+        if stages is not None:
+            stages["frame"] = t1 - t0
+            stages["preprocess"] = t2 - t1
+            stages["model"] = perf_counter() - t2
+        return preds
+
+    def warm_up(self):
+        """Run one prediction so lazy imports and page faults happen before the first request."""
+        t0 = perf_counter()
+        self.predict_rows([WARMUP_ROW])
+        self.warmup_seconds = perf_counter() - t0
+        return self
+
+
+def row_encoder(model, meta: dict) -> CompiledPreprocessor | None:
+    """Encoder for a (preprocessor, estimator) pipeline whose inputs match meta["features"]."""
+    if not hasattr(model, "steps") or len(model.steps) != 2:
+        return None
+    try:
+        encoder = compile_preprocessor(model[0])
+    except (ValueError, AttributeError):
+        return None
+    features = meta.get("features")
+    if features and sorted(features) != sorted(encoder.features):
+        return None
+    return encoder
+
+
+def read_meta(meta_path) -> dict:
+    p = Path(meta_path)
+    return json.loads(p.read_text(encoding="utf-8")) if p.is_file() else {}
+
+
+def _is_fresh(compiled: Path, model_path: Path) -> bool:
+    spec = compiled / SPEC_FILE
+    if not spec.is_file():
+        return False
+    return not model_path.is_file() or spec.stat().st_mtime_ns >= model_path.stat().st_mtime_ns
+
+
+@contextmanager
+def _compile_lock(compiled: Path, exclusive: bool):
+    """Shared lock to read the compiled dir, exclusive to replace it."""
+    fd = None
+    if fcntl is not None:
+        try:
+            fd = os.open(compiled.with_name(compiled.name + ".lock"), os.O_RDWR | os.O_CREAT)
+        except OSError:   # read-only models/ dir: nobody can write there either
+            fd = None
+    try:
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+
+def _save_compiled_atomic(forest, compiled: Path):
+    """Write into a temp dir and rename it into place; hold the exclusive compile lock,
+    `compiled` is briefly missing between the two renames."""
+    tmp = compiled.with_name(f"{compiled.name}.tmp{os.getpid()}")
+    old = compiled.with_name(f"{compiled.name}.old{os.getpid()}")
+    save_compiled(forest, tmp)
+    try:
+        if compiled.exists():
+            os.replace(compiled, old)
+        os.replace(tmp, compiled)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def load_model(model_path, meta_path=None, compiled_path=None,
+               mmap_mode: str | None = "r", prefer: str = "compiled") -> LoadedModel:
+    """Load a model for serving; `prefer="sklearn"` skips the compiled engine
+    (faster on large batches, but not memory-mapped)."""
+    import joblib
+
+    t0 = perf_counter()
+    model_path = Path(model_path)
+    compiled = Path(compiled_path or compiled_path_for(model_path))
+    meta = read_meta(meta_path or model_path.with_suffix(model_path.suffix + ".meta.json"))
+
+    if prefer == "sklearn" and model_path.is_file():
+        model = joblib.load(model_path, mmap_mode=mmap_mode)
+        return LoadedModel(model_path, meta, model, None, perf_counter() - t0)
+    engine = model = None
+    damaged = False
+    with _compile_lock(compiled, exclusive=False):
+        if _is_fresh(compiled, model_path):
+            try:
+                engine = load_compiled(compiled, mmap_mode=mmap_mode)
+            except (OSError, ValueError, KeyError) as e:
+                # replaced or damaged under us: rebuild it from the joblib file
+                print(f"Could not read {compiled}: {e}")
+                damaged = True
+    if engine is None:
+        model = joblib.load(model_path, mmap_mode=mmap_mode)
+        try:
+            engine = compile_pipeline(model)
+        except ValueError:
+            engine = None
+        if engine is not None:
+            try:
+                with _compile_lock(compiled, exclusive=True):
+                    # another worker may have compiled it while we waited
+                    if damaged or not _is_fresh(compiled, model_path):
+                        _save_compiled_atomic(engine, compiled)
+                    engine, model = load_compiled(compiled, mmap_mode=mmap_mode), None
+            except (OSError, ValueError, KeyError) as e:
+                # read-only models/ dir: serve the in-memory compiled copy
+                print(f"Could not write {compiled}: {e}")
+    return LoadedModel(model_path, meta, model, engine, perf_counter() - t0)
+
+
+class ModelWatcher(threading.Thread):
+    """Poll model/meta/compiled files and call `on_change()` once a change has settled.
+
+    The signature is taken again after `on_change()`, so files the reload
+    writes itself (the compiled artifact) do not trigger a second reload.
+    """
+
+    def __init__(self, paths, on_change, interval_s: float = 5.0):
+        super().__init__(name="model-watcher", daemon=True)
+        self.paths = [Path(p) for p in paths]
+        self.on_change = on_change
+        self.interval_s = interval_s
+        self._last = self._signature()
+        self._candidate = None
+        self._stop_event = threading.Event()
+
+    def _signature(self) -> tuple:
+        sig = []
+        for p in self.paths:
+            try:
+                st = p.stat()
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def poll(self) -> bool:
+        """Return True if `on_change` was called on this poll."""
+        sig = self._signature()
+        if sig == self._last:
+            self._candidate = None
+            return False
+        if sig != self._candidate:
+            # changed since the last poll: wait one more interval for writes to finish
+            self._candidate = sig
+            return False
+        self._candidate = None
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"Model reload failed, keeping the current model: {e}")
+        self._last = self._signature()
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.interval_s):
+            self.poll()
+
+    def stop(self):
+        self._stop_event.set()
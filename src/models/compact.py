@@ -0,0 +1,118 @@
+"""Compaction levels for the serving artifact, with a size/speed/accuracy report.
+
+Each level compiles the trained forest (see `src/models/compile.py`) with a
+cap on trees / depth / leaf size and/or smaller dtypes, and is written as a
+compiled directory the API can serve via `COMPILED_PATH`:
+
+    full     all trees, float64 node arrays (what `--compile` writes)
+    exact    full forest, smallest dtypes (float32 values ~1e-7 relative)
+    small    exact + depth <= 16, leaves >= 3 samples
+    tiny     small + 100 trees, depth <= 12, leaves >= 5 samples
+
+`--compress` stores each level as one compressed `.npz` (not memory-mapped).
+The report lists disk size, load time, single-row latency and hold-out MAE
+(same split as `train_on_df`) per level next to the original joblib model.
+
+    python -m src.models.compact --model models/baseline.joblib --data data/berlin_clean.csv
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from src.models.compile import compile_pipeline, load_compiled, save_compiled, shrink_dtypes
+from src.models.train import FEATURES, TARGET, load_data
+
+LEVELS = {
+    "full": {"shrink": False},
+    "exact": {"shrink": True},
+    "small": {"shrink": True, "max_depth": 16, "min_leaf_samples": 3},
+    "tiny": {"shrink": True, "max_trees": 100, "max_depth": 12, "min_leaf_samples": 5},
+}
+
+
+def compact(pipe, level: str):
+    opts = dict(LEVELS[level])
+    shrink = opts.pop("shrink")
+    forest = compile_pipeline(pipe, **opts)
+    return shrink_dtypes(forest) if shrink else forest
+
+
+def _disk_mb(path: Path) -> float:
+    files = [path] if path.is_file() else [f for f in path.rglob("*") if f.is_file()]
+    return sum(f.stat().st_size for f in files) / 2**20
+
+
+def _p50_ms(fn, calls: int) -> float:
+    fn()
+    times = np.empty(calls)
+    for i in range(calls):
+        t0 = perf_counter()
+        fn()
+        times[i] = perf_counter() - t0
+    return float(np.percentile(times, 50) * 1e3)
+
+
+def holdout(df: pd.DataFrame):
+    """The validation rows `train_on_df` held out (same split and seed)."""
+    _, X_va, _, y_va = train_test_split(df[FEATURES], df[TARGET].astype(float),
+                                        test_size=0.2, random_state=42)
+    return X_va, y_va.to_numpy()
+
+
+def report(model_path, X_va, y_va, out_dir, levels=tuple(LEVELS), compress: bool = False,
+           latency_calls: int = 100) -> pd.DataFrame:
+    """Write every level under `out_dir/<level>` and measure it against the joblib model."""
+    model_path = Path(model_path)
+    t0 = perf_counter()
+    pipe = joblib.load(model_path)
+    load_s = perf_counter() - t0
+    row = X_va.iloc[[0]]
+    rows = [{"level": "joblib", "size_mb": _disk_mb(model_path), "load_seconds": load_s,
+             "predict_p50_ms": _p50_ms(lambda: pipe.predict(row), latency_calls),
+             "mae": float(mean_absolute_error(y_va, pipe.predict(X_va))),
+             "n_trees": len(getattr(pipe[-1], "estimators_", [])), "max_depth": None}]
+
+    record = {k: [v] for k, v in row.iloc[0].items()}
+    for level in levels:
+        out = save_compiled(compact(pipe, level), Path(out_dir) / level, compress=compress)
+        t0 = perf_counter()
+        forest = load_compiled(out, mmap_mode=None if compress else "r")
+        load_s = perf_counter() - t0
+        rows.append({"level": level, "size_mb": _disk_mb(out), "load_seconds": load_s,
+                     "predict_p50_ms": _p50_ms(lambda: forest.predict(record), latency_calls),
+                     "mae": float(mean_absolute_error(y_va, forest.predict(X_va))),
+                     "n_trees": forest.n_trees, "max_depth": forest.max_depth})
+    return pd.DataFrame(rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write compacted model artifacts and compare them.")
+    ap.add_argument("--model", default="models/baseline.joblib")
+    ap.add_argument("--data", default="data/berlin_clean.csv",
+                    help="Cleaned training table, for the hold-out MAE")
+    ap.add_argument("--levels", nargs="+", choices=list(LEVELS), default=list(LEVELS))
+    ap.add_argument("--compress", action="store_true",
+                    help="Store node arrays compressed (smaller, loaded into memory)")
+    ap.add_argument("--out-dir", default=None, help="Default: <model>.compact/")
+    ap.add_argument("--report", default="reports/compaction.csv")
+    args = ap.parse_args()
+
+    out_dir = args.out_dir or f"{args.model}.compact"
+    X_va, y_va = holdout(load_data(args.data))
+    table = report(args.model, X_va, y_va, out_dir, args.levels, args.compress)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(args.report, index=False)
+    print(f"Artifacts in {out_dir}/<level> (serve one with COMPILED_PATH) | report -> {args.report}")
+
+
+if __name__ == "__main__":
+    main()
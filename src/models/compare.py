@@ -0,0 +1,74 @@
+"""Side-by-side report of the training engines on one dataset.
+
+Every engine in `ENGINES` is trained with `train_on_df` on the same split and
+measured on fit time, single-row and batch predict time, joblib size on
+disk and hold-out MAE/RMSE. The table is printed and written as CSV.
+
+    python -m src.models.compare --data data/berlin_clean.csv --out reports/engine_comparison.csv
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.models.train import ENGINES, FEATURES, load_data, train_on_df
+
+
+def _latency_ms(pipe, row: pd.DataFrame, calls: int) -> np.ndarray:
+    pipe.predict(row)   # first call pays for lazy setup
+    out = np.empty(calls)
+    for i in range(calls):
+        t0 = perf_counter()
+        pipe.predict(row)
+        out[i] = (perf_counter() - t0) * 1e3
+    return out
+
+
+def compare_engines(df: pd.DataFrame, engines=ENGINES, latency_calls: int = 50) -> pd.DataFrame:
+    X = df[FEATURES]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine in engines:
+            t0 = perf_counter()
+            pipe, metrics = train_on_df(df, engine)
+            fit_s = perf_counter() - t0
+
+            path = Path(tmp) / f"{engine}.joblib"
+            joblib.dump(pipe, path)
+            lat = _latency_ms(pipe, X.head(1), latency_calls)
+            t0 = perf_counter()
+            pipe.predict(X)
+            batch_s = perf_counter() - t0
+
+            rows.append({"engine": engine, "fit_seconds": fit_s,
+                         "size_mb": path.stat().st_size / 2**20,
+                         "predict_p50_ms": float(np.percentile(lat, 50)),
+                         "predict_p99_ms": float(np.percentile(lat, 99)),
+                         "batch_rows_per_s": len(X) / batch_s,
+                         "mae": metrics["mae"], "rmse": metrics["rmse"], "r2": metrics["r2"]})
+    return pd.DataFrame(rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare training engines side by side.")
+    ap.add_argument("--data", default="data/berlin_clean.csv")
+    ap.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    ap.add_argument("--out", default="reports/engine_comparison.csv")
+    args = ap.parse_args()
+
+    report = compare_engines(load_data(args.data), args.engines)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    report.to_csv(out, index=False)
+    print(f"Saved report to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""Flatten a fitted price pipeline into plain NumPy arrays for fast inference.
+
+`compile_pipeline` turns the `Pipeline` built by `train_on_df` (impute ->
+scale / one-hot -> RandomForest) into a `CompiledForest`: the preprocessor
+becomes a handful of constants per column and all trees are concatenated
+into contiguous node arrays that are walked level by level for a block of
+trees at once. Predictions match `pipe.predict` up to float summation order.
+
+This is built for low single-row latency; on large batches sklearn's Cython
+tree walk is still about twice as fast.
+
+Compaction (see `src/models/compact.py`) can cap the number of trees, the
+depth and the leaf size while compiling, store node arrays in the smallest
+dtypes that keep the comparisons exact, and optionally compress them.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+
+SPEC_FILE = "spec.json"
+NODE_ARRAYS = ["feature", "threshold", "left", "right", "value", "roots"]
+PACKED_FILE = "nodes.npz"   # compressed alternative to one .npy per array
+
+
+def compiled_path_for(model_path) -> Path:
+    """Default location of the compiled artifact next to a `.joblib` model."""
+    p = Path(model_path)
+    return p.with_suffix(p.suffix + ".compiled")
+
+
+# ---------- preprocessor ----------
+
+class CompiledPreprocessor:
+    """Imputer/scaler/one-hot constants laid out in the model's column order."""
+
+    def __init__(self, columns: list[dict]):
+        self.columns = columns
+        self.n_features_out = 0
+        for col in columns:
+            col["offset"] = self.n_features_out
+            if col["kind"] in ("cat", "ord"):
+                col["lookup"] = {c: i for i, c in enumerate(col["categories"])
+                                 if not _is_missing(c)}
+            self.n_features_out += len(col["categories"]) if col["kind"] == "cat" else 1
+        # per-column constants as tuples for the row-at-a-time encoder
+        self._plan = [(c["name"], c["kind"], c["offset"], c["fill"], c.get("mean", 0.0),
+                       c.get("scale", 1.0), c.get("lookup")) for c in columns]
+
+    @property
+    def features(self) -> list[str]:
+        return [c["name"] for c in self.columns]
+
+    def transform(self, X) -> np.ndarray:
+        """Encode a DataFrame or a mapping of column -> values into a float32 matrix."""
+        n = _n_rows(X)
+        out = np.zeros((n, self.n_features_out), dtype=np.float64)
+        rows = np.arange(n)
+        for col in self.columns:
+            values = X[col["name"]]
+            if col["kind"] == "num":
+                v = np.array(values, dtype=np.float64)
+                v[np.isnan(v)] = col["fill"]
+                out[:, col["offset"]] = (v - col["mean"]) / col["scale"]
+            elif col["kind"] == "ord":
+                lookup = col["lookup"]
+                out[:, col["offset"]] = np.fromiter(
+                    (np.nan if _is_missing(v) else lookup.get(v, np.nan) for v in values),
+                    dtype=np.float64, count=n)
+            else:
+                lookup, fill = col["lookup"], col["fill"]
+                idx = np.fromiter((lookup.get(fill if _is_missing(v) else v, -1)
+                                   for v in values), dtype=np.intp, count=n)
+                hit = idx >= 0
+                out[rows[hit], col["offset"] + idx[hit]] = 1.0
+        # trees compare float32 inputs against float64 thresholds, like sklearn
+        return out.astype(np.float32)
+
+    def encode_rows(self, rows: list[Mapping]) -> np.ndarray:
+        """Encode request dicts straight into a float64 matrix, one row at a time.
+
+        Same values as the fitted `ColumnTransformer` (plain float arithmetic is
+        the same IEEE double math), without building a DataFrame.
+        """
+        out = np.zeros((len(rows), self.n_features_out), dtype=np.float64)
+        for i, row in enumerate(rows):
+            dst = out[i]
+            for name, kind, offset, fill, mean, scale, lookup in self._plan:
+                v = row[name]
+                if kind == "num":
+                    if v is None or v != v:
+                        v = fill
+                    dst[offset] = (v - mean) / scale
+                elif kind == "cat":
+                    j = lookup.get(fill if _is_missing(v) else v)
+                    if j is not None:
+                        dst[offset + j] = 1.0
+                else:
+                    dst[offset] = np.nan if _is_missing(v) else lookup.get(v, np.nan)
+        return out
+
+    def to_spec(self) -> list[dict]:
+        return [{k: v for k, v in c.items() if k not in ("offset", "lookup")}
+                for c in self.columns]
+
+
+def _is_missing(v) -> bool:
+    return v is None or (isinstance(v, float) and v != v)
+
+
+def compile_preprocessor(prep) -> CompiledPreprocessor:
+    """Public entry point; raises ValueError for steps the compiler does not support."""
+    return _compile_preprocessor(prep)
+
+
+def _n_rows(X) -> int:
+    if hasattr(X, "shape"):
+        return int(X.shape[0])
+    return len(next(iter(X.values())))
+
+
+def _compile_preprocessor(prep) -> CompiledPreprocessor:
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import (FunctionTransformer, OneHotEncoder, OrdinalEncoder,
+                                       StandardScaler)
+
+    columns: list[dict] = []
+    for name, trans, cols in prep.transformers_:
+        if trans == "drop" or len(cols) == 0:
+            continue
+        if trans == "passthrough":
+            steps = []
+        elif isinstance(trans, Pipeline):
+            steps = [s for _, s in trans.steps if s != "passthrough"]
+        else:
+            steps = [trans]
+
+        specs = [{"name": c, "kind": "num", "fill": np.nan, "mean": 0.0, "scale": 1.0}
+                 for c in cols]
+        for step in steps:
+            if isinstance(step, SimpleImputer):
+                if step.strategy == "constant" or step.add_indicator:
+                    raise ValueError(f"Unsupported imputer in '{name}': {step}")
+                for spec, fill in zip(specs, step.statistics_):
+                    spec["fill"] = fill.item() if hasattr(fill, "item") else fill
+            elif isinstance(step, StandardScaler):
+                for i, spec in enumerate(specs):
+                    spec["mean"] = float(step.mean_[i]) if step.with_mean else 0.0
+                    spec["scale"] = float(step.scale_[i]) if step.with_std else 1.0
+            elif isinstance(step, OneHotEncoder):
+                if step.drop is not None or step.handle_unknown != "ignore":
+                    raise ValueError(f"Unsupported one-hot encoder in '{name}': {step}")
+                for spec, cats in zip(specs, step.categories_):
+                    spec["kind"] = "cat"
+                    spec["categories"] = [c.item() if hasattr(c, "item") else c
+                                          for c in cats]
+            elif isinstance(step, OrdinalEncoder):
+                infrequent = getattr(step, "infrequent_categories_", None) or []
+                if (any(i is not None for i in infrequent)
+                        or step.handle_unknown != "use_encoded_value"
+                        or not _is_missing(step.unknown_value)
+                        or not _is_missing(step.encoded_missing_value)):
+                    raise ValueError(f"Unsupported ordinal encoder in '{name}': {step}")
+                for spec, cats in zip(specs, step.categories_):
+                    spec["kind"] = "ord"
+                    spec["categories"] = [c.item() if hasattr(c, "item") else c
+                                          for c in cats]
+            elif isinstance(step, FunctionTransformer) and step.func is None:
+                pass    # fitted ColumnTransformers store "passthrough" as an identity function
+            else:
+                raise ValueError(f"Unsupported step in '{name}': {type(step).__name__}")
+        for spec in specs:
+            if spec["kind"] in ("cat", "ord"):
+                spec.pop("mean"), spec.pop("scale")
+            elif isinstance(spec["fill"], str):
+                raise ValueError(f"Column '{spec['name']}' is categorical but not one-hot encoded")
+        columns.extend(specs)
+    return CompiledPreprocessor(columns)
+
+
+# ---------- forest ----------
+
+class CompiledForest:
+    """Array-backed replacement for a fitted preprocessor + tree-ensemble pipeline."""
+
+    # (tree, row) pairs walked together; small blocks keep node arrays in cache,
+    # while a single row walks every tree in one pass
+    BLOCK_PAIRS = 100_000
+
+    def __init__(self, prep: CompiledPreprocessor, arrays: Mapping[str, np.ndarray],
+                 max_depth: int):
+        self.prep = prep
+        self.arrays = dict(arrays)
+        self.max_depth = int(max_depth)
+        for k in NODE_ARRAYS:
+            setattr(self, k, self.arrays[k])
+        self.n_trees = len(self.roots)
+        # children[2 * node + go_right]; leaves point to themselves
+        self.children = np.stack([self.left, self.right], axis=1).ravel()
+        self.is_leaf = self.left == np.arange(len(self.left), dtype=self.left.dtype)
+
+    @property
+    def features(self) -> list[str]:
+        return self.prep.features
+
+    def predict(self, X, chunk_size: int = 4096) -> np.ndarray:
+        """Predict from a DataFrame or a mapping of column -> values."""
+        return self.predict_transformed(self.prep.transform(X), chunk_size)
+
+    def predict_transformed(self, Xt: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """Predict from an already encoded float32 matrix (`prep.transform` output)."""
+        return np.concatenate([self._predict_matrix(Xt[i:i + chunk_size])
+                               for i in range(0, max(len(Xt), 1), chunk_size)])
+
+    def predict_one(self, record: Mapping) -> float:
+        return float(self.predict({k: [v] for k, v in record.items()})[0])
+
+    def _leaves(self, Xt: np.ndarray, roots: np.ndarray) -> np.ndarray:
+        """Leaf index for every (tree, row) pair, shape (len(roots), n_rows)."""
+        n, n_feat = Xt.shape
+        flat = Xt.ravel()
+        node = np.repeat(roots, n)
+        row_base = np.tile(np.arange(n, dtype=np.int64) * n_feat, len(roots))
+        pos = np.arange(len(node))
+        leaf = np.empty(len(node), dtype=node.dtype)
+        done = self.is_leaf[node]
+        # walk one level per pass, dropping (tree, row) pairs as they reach a leaf
+        while True:
+            if done.any():
+                leaf[pos[done]] = node[done]
+                keep = ~done
+                node, row_base, pos = node[keep], row_base[keep], pos[keep]
+            if len(node) == 0:
+                return leaf.reshape(len(roots), n)
+            go_right = flat[row_base + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+            done = self.is_leaf[node]
+
+    def _predict_matrix(self, Xt: np.ndarray) -> np.ndarray:
+        total = np.zeros(len(Xt), dtype=np.float64)
+        if len(Xt) == 0:
+            return total
+        block = max(1, self.BLOCK_PAIRS // len(Xt))
+        for i in range(0, self.n_trees, block):
+            leaves = self._leaves(Xt, self.roots[i:i + block])
+            total += self.value[leaves].sum(axis=0, dtype=np.float64)
+        return total / self.n_trees
+
+
+def _prune_tree(t, max_depth: int | None, min_leaf_samples: float | None):
+    """Nodes kept and which of them become leaves when capping depth / leaf size.
+
+    A split is undone when either child holds fewer than `min_leaf_samples`
+    (weighted) training samples; the node then predicts its own mean.
+    """
+    left, right = t.children_left, t.children_right
+    leaf = left < 0
+    if min_leaf_samples:
+        w = t.weighted_n_node_samples
+        inner = ~leaf
+        leaf = leaf.copy()
+        leaf[inner] = (w[left[inner]] < min_leaf_samples) | (w[right[inner]] < min_leaf_samples)
+    keep = np.zeros(t.node_count, dtype=bool)
+    frontier, depth = np.array([0]), 0
+    while True:
+        keep[frontier] = True
+        if max_depth is not None and depth >= max_depth:
+            leaf[frontier] = True
+        inner = frontier[~leaf[frontier]]
+        if len(inner) == 0:
+            return keep, leaf, depth
+        frontier, depth = np.concatenate([left[inner], right[inner]]), depth + 1
+
+
+def compile_pipeline(pipe, max_trees: int | None = None, max_depth: int | None = None,
+                     min_leaf_samples: float | None = None) -> CompiledForest:
+    """Build a `CompiledForest` from a fitted `Pipeline([("prep", ...), ("model", ...)])`.
+
+    `max_trees`, `max_depth` and `min_leaf_samples` prune the fitted trees
+    (lossy); by default the forest is compiled as is. Raises ValueError if a
+    step is not one the compiler understands.
+    """
+    from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+    if len(pipe) != 2:
+        raise ValueError("Expected a (preprocessor, estimator) pipeline")
+    prep = _compile_preprocessor(pipe[0])
+    est = pipe[-1]
+    if not isinstance(est, (RandomForestRegressor, ExtraTreesRegressor)) or est.n_outputs_ != 1:
+        raise ValueError(f"Unsupported estimator: {type(est).__name__}")
+    trees = [t.tree_ for t in est.estimators_[:max_trees]]
+
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    base, depth = 0, 0
+    for t in trees:
+        keep, leaf, d = _prune_tree(t, max_depth, min_leaf_samples)
+        nodes = np.flatnonzero(keep)
+        new_id = (np.cumsum(keep) - 1 + base).astype(np.int32)
+        leaf = leaf[nodes]
+        own = new_id[nodes]
+        feature.append(np.where(leaf, 0, t.feature[nodes]).astype(np.int32))
+        threshold.append(np.where(leaf, 0.0, t.threshold[nodes]))
+        left.append(np.where(leaf, own, new_id[t.children_left[nodes]]))
+        right.append(np.where(leaf, own, new_id[t.children_right[nodes]]))
+        value.append(t.value[nodes, 0, 0])
+        roots.append(base)
+        base, depth = base + len(nodes), max(depth, d)
+    arrays = {
+        "feature": np.concatenate(feature), "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left), "right": np.concatenate(right),
+        "value": np.concatenate(value), "roots": np.array(roots, dtype=np.int32),
+    }
+    if int(arrays["feature"].max(initial=0)) >= prep.n_features_out:
+        raise ValueError("Tree features do not match the preprocessor output")
+    return CompiledForest(prep, arrays, depth)
+
+
+def shrink_dtypes(forest: CompiledForest) -> CompiledForest:
+    """Smallest dtypes that keep predictions (nearly) identical.
+
+    Feature ids become uint8/uint16. Thresholds become float32 rounded down,
+    which is exact: inputs are float32, and a float32 x satisfies
+    x > t  <=>  x > round_down_f32(t). Leaf values become float32 (~1e-7
+    relative); they are summed in float64. Node indices stay int32 for the
+    index arithmetic in the tree walk.
+    """
+    a = dict(forest.arrays)
+    n_feat = forest.prep.n_features_out
+    a["feature"] = np.asarray(a["feature"]).astype(np.uint8 if n_feat <= 2**8 else
+                                                   np.uint16 if n_feat <= 2**16 else np.int32)
+    t64 = np.asarray(a["threshold"], dtype=np.float64)
+    t32 = t64.astype(np.float32)
+    a["threshold"] = np.where(t32 > t64, np.nextafter(t32, np.float32(-np.inf)), t32)
+    a["value"] = np.asarray(a["value"]).astype(np.float32)
+    return CompiledForest(forest.prep, a, forest.max_depth)
+
+
+# ---------- persistence ----------
+
+def save_compiled(forest: CompiledForest, out_dir, compress: bool = False) -> Path:
+    """Write one `.npy` per node array plus a `spec.json` into `out_dir`.
+
+    With `compress=True` the arrays go into one compressed `nodes.npz`
+    instead: smaller on disk, but loaded into memory rather than mapped.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    arrays = {k: np.ascontiguousarray(forest.arrays[k]) for k in NODE_ARRAYS}
+    for stale in [*(out / f"{k}.npy" for k in NODE_ARRAYS), out / PACKED_FILE]:
+        stale.unlink(missing_ok=True)
+    if compress:
+        np.savez_compressed(out / PACKED_FILE, **arrays)
+    else:
+        for k, arr in arrays.items():
+            np.save(out / f"{k}.npy", arr)
+    spec = {"columns": forest.prep.to_spec(), "max_depth": forest.max_depth,
+            "n_trees": forest.n_trees, "compressed": compress}
+    (out / SPEC_FILE).write_text(json.dumps(spec, indent=2), encoding="utf-8")
+    return out
+
+
+def load_compiled(path, mmap_mode: str | None = None) -> CompiledForest:
+    p = Path(path)
+    spec = json.loads((p / SPEC_FILE).read_text(encoding="utf-8"))
+    for col in spec["columns"]:
+        if col["fill"] is None:
+            col["fill"] = np.nan
+    if spec.get("compressed"):
+        with np.load(p / PACKED_FILE) as packed:
+            arrays = {k: packed[k] for k in NODE_ARRAYS}
+    else:
+        arrays = {k: np.load(p / f"{k}.npy", mmap_mode=mmap_mode) for k in NODE_ARRAYS}
+    return CompiledForest(CompiledPreprocessor(spec["columns"]), arrays, spec["max_depth"])
+
+
+# ---------- CLI ----------
+
+def _time_single_row(fn, n: int = 200) -> float:
+    from time import perf_counter
+    fn()
+    t0 = perf_counter()
+    for _ in range(n):
+        fn()
+    return (perf_counter() - t0) / n * 1e3
+
+
+def main():
+    import argparse
+    import joblib
+    import pandas as pd
+
+    ap = argparse.ArgumentParser(description="Compile a trained model into NumPy node arrays")
+    ap.add_argument("--model", default="models/baseline.joblib")
+    ap.add_argument("--out", default=None, help="Output directory (default: <model>.compiled)")
+    ap.add_argument("--data", default=None,
+                    help="Optional cleaned CSV to verify predictions and time single rows")
+    args = ap.parse_args()
+
+    pipe = joblib.load(args.model)
+    forest = compile_pipeline(pipe)
+    out = save_compiled(forest, args.out or compiled_path_for(args.model))
+    print(f"Compiled {forest.n_trees} trees ({len(forest.value)} nodes) -> {out}")
+
+    if args.data:
+        X = pd.read_csv(args.data, low_memory=False)[forest.features]
+        diff = np.abs(forest.predict(X) - pipe.predict(X)).max()
+        print(f"Max abs diff vs pipe.predict on {len(X)} rows: {diff:.3g}")
+        row = X.iloc[[0]]
+        record = row.iloc[0].to_dict()
+        ms_pipe = _time_single_row(lambda: pipe.predict(row), n=20)
+        ms_comp = _time_single_row(lambda: forest.predict_one(record))
+        print(f"Single-row latency: pipe {ms_pipe:.2f} ms | compiled {ms_comp:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Lookup index of robust price statistics for instant ballpark estimates.
+
+Cells are keyed by (neighbourhood, room type, accommodates bucket) and hold
+the median, quartiles and sample size of the nightly price. A lookup backs
+off through coarser levels until it finds a cell with at least `min_count`
+listings:
+
+    neighbourhood + room_type + accommodates
+    neighbourhood + room_type
+    room_type + accommodates
+    room_type
+    (all listings)
+
+The index is a small JSON file next to the model (`<model>.price_index.json`)
+and a lookup is a handful of dict gets; loading and single lookups do not
+import pandas.
+"""
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+LEVELS = [
+    ("neighbourhood", "room_type", "accommodates"),
+    ("neighbourhood", "room_type"),
+    ("room_type", "accommodates"),
+    ("room_type",),
+    (),
+]
+# accommodates -> bucket label; larger listings share one cell
+BUCKETS = [(1, "1"), (2, "2"), (4, "3-4"), (6, "5-6"), (math.inf, "7+")]
+SEP = "|"
+
+
+def accommodates_bucket(value) -> str | None:
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(v):
+        return None
+    return next(label for upper, label in BUCKETS if v <= upper)
+
+
+def index_path_for(model_path) -> Path:
+    p = Path(model_path)
+    return p.with_name(p.name + ".price_index.json")
+
+
+def build_index(df: pd.DataFrame, target: str = "price", min_count: int = 10) -> dict:
+    """Per-level price statistics: {level: {key: [median, p25, p75, n]}}."""
+    import numpy as np
+    import pandas as pd
+
+    data = pd.DataFrame({
+        "neighbourhood": df["neighbourhood"].astype("string"),
+        "room_type": df["room_type"].astype("string"),
+        "accommodates": df["accommodates"].map(accommodates_bucket).astype("string"),
+        "price": pd.to_numeric(df[target], errors="coerce"),
+    }).dropna(subset=["price"])
+    cells = {}
+    for cols in LEVELS:
+        name = "+".join(cols) or "all"
+        if not cols:
+            groups = {"": data["price"]}.items()
+        else:
+            sub = data.dropna(subset=list(cols))
+            groups = ((SEP.join(k if isinstance(k, tuple) else (k,)), g["price"])
+                      for k, g in sub.groupby(list(cols), sort=True))
+        level = {}
+        for key, prices in groups:
+            q = np.percentile(prices.to_numpy(np.float64), [50, 25, 75])
+            level[key] = [round(float(q[0]), 2), round(float(q[1]), 2), round(float(q[2]), 2),
+                          int(len(prices))]
+        cells[name] = level
+    return {"min_count": int(min_count), "target": target, "n_rows": int(len(data)),
+            "cells": cells}
+
+
+def save_index(index: dict, path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    return path
+
+
+class PriceIndex:
+    """Backoff lookups over a `build_index` table."""
+
+    def __init__(self, index: dict):
+        self.index = index
+        self.min_count = int(index.get("min_count", 1))
+        self._levels = [(cols, index["cells"].get("+".join(cols) or "all", {}))
+                        for cols in LEVELS]
+
+    @classmethod
+    def load(cls, path) -> "PriceIndex":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def lookup(self, row: dict) -> dict:
+        """Estimate for one listing: price, p25, p75, sample_size and the level used."""
+        values = {"neighbourhood": row.get("neighbourhood"), "room_type": row.get("room_type"),
+                  "accommodates": accommodates_bucket(row.get("accommodates"))}
+        cell, name = None, "all"
+        for cols, level in self._levels:
+            if any(values[c] is None for c in cols):
+                continue
+            found = level.get(SEP.join(str(values[c]) for c in cols))
+            if found is not None and (found[3] >= self.min_count or not cols):
+                cell, name = found, "+".join(cols) or "all"
+                break
+        if cell is None:
+            return {"price": None, "p25": None, "p75": None, "sample_size": 0, "level": None}
+        return {"price": cell[0], "p25": cell[1], "p75": cell[2], "sample_size": cell[3],
+                "level": name}
+
+    def lookup_frame(self, X: pd.DataFrame) -> pd.DataFrame:
+        import pandas as pd
+
+        cols = [c for c in ("neighbourhood", "room_type", "accommodates") if c in X.columns]
+        return pd.DataFrame([self.lookup(r) for r in X[cols].to_dict("records")],
+                            index=X.index)
@@ -0,0 +1,132 @@
+"""Hyperparameter search over the RandomForest with cached preprocessing.
+
+The imputer/scaler/one-hot step is fitted once per data fingerprint and the
+transformed matrix is cached on disk (`models/.prep_cache/<fingerprint>.joblib`),
+so repeated searches on the same snapshot skip it entirely. The preprocessing
+never sees the target, so fitting it on all rows before splitting only
+shares column medians/scales/categories between folds.
+
+Each trial runs k-fold CV with the folds fitted in parallel (joblib shares
+the cached matrix with the workers via memory mapping). Trials run until
+the space is exhausted or the wall-clock budget is spent; the first trial
+always runs, and a trial that starts inside the budget is allowed to finish.
+
+    python -m src.models.train --data data/berlin_clean.csv --search random --trials 30 --budget-s 600
+"""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from time import perf_counter
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, ParameterGrid, ParameterSampler
+from sklearn.pipeline import Pipeline
+
+from src.models.train import FEATURES, TARGET, _make_preprocessor
+
+CACHE_DIR = Path("models/.prep_cache")
+PARAM_SPACE = {
+    "n_estimators": [100, 200, 300, 500],
+    "max_depth": [None, 10, 20, 30],
+    "min_samples_leaf": [1, 2, 5, 10],
+    "max_features": [1.0, 0.5, "sqrt"],
+}
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Hash of the training columns plus the preprocessing definition."""
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(df[FEATURES + [TARGET]], index=False).to_numpy().tobytes())
+    h.update(repr(_make_preprocessor()).encode())
+    h.update(sklearn.__version__.encode())
+    return h.hexdigest()[:16]
+
+
+def preprocess_cached(df: pd.DataFrame, cache_dir=CACHE_DIR):
+    """Return (fitted preprocessor, X matrix, y, cache_hit) for `df`."""
+    path = Path(cache_dir) / f"{data_fingerprint(df)}.joblib"
+    if path.is_file():
+        prep, Xt, y = joblib.load(path, mmap_mode="r")
+        return prep, Xt, y, True
+    prep = _make_preprocessor()
+    Xt = np.ascontiguousarray(prep.fit_transform(df[FEATURES]))
+    y = df[TARGET].to_numpy(dtype=float)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump((prep, Xt, y), path)
+    return prep, Xt, y, False
+
+
+def candidates(mode: str, n_trials: int, seed: int = 42, space=PARAM_SPACE) -> list[dict]:
+    if mode == "grid":
+        return list(ParameterGrid(space))
+    if mode == "random":
+        return list(ParameterSampler(space, n_iter=n_trials, random_state=seed))
+    raise ValueError(f"Unknown search mode: {mode!r} (expected 'grid' or 'random')")
+
+
+def _fit_fold(params: dict, Xt, y, tr, va, seed: int) -> dict:
+    t0 = perf_counter()
+    model = RandomForestRegressor(**params, random_state=seed, n_jobs=1).fit(Xt[tr], y[tr])
+    fit_s = perf_counter() - t0
+    pred = model.predict(Xt[va])
+    return {"mae": mean_absolute_error(y[va], pred),
+            "rmse": float(np.sqrt(mean_squared_error(y[va], pred))),
+            "r2": r2_score(y[va], pred), "fit_seconds": fit_s}
+
+
+def search(df: pd.DataFrame, mode: str = "random", n_trials: int = 20, cv: int = 5,
+           budget_s: float | None = None, n_jobs: int = -1, cache_dir=CACHE_DIR,
+           seed: int = 42, space=PARAM_SPACE):
+    """Cross-validate candidates within the budget and refit the best on all rows.
+
+    Returns (pipeline, metrics, trials table, search info).
+    """
+    missing = [c for c in FEATURES + [TARGET] if c not in df.columns]
+    if missing:
+        raise KeyError(f"Missing columns: {missing}")
+    t_start = perf_counter()
+    prep, Xt, y, hit = preprocess_cached(df, cache_dir)
+    t_prep = perf_counter() - t_start
+    folds = list(KFold(cv, shuffle=True, random_state=seed).split(Xt))
+    todo = candidates(mode, n_trials, seed, space)
+
+    rows = []
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for i, params in enumerate(todo):
+            if rows and budget_s is not None and perf_counter() - t_start >= budget_s:
+                break
+            t0 = perf_counter()
+            scores = parallel(delayed(_fit_fold)(params, Xt, y, tr, va, seed) for tr, va in folds)
+            s = pd.DataFrame(scores)
+            rows.append({"trial": i, **{k: str(v) for k, v in params.items()},
+                         "mae": s["mae"].mean(), "mae_std": s["mae"].std(ddof=0),
+                         "rmse": s["rmse"].mean(), "r2": s["r2"].mean(),
+                         "fit_seconds": s["fit_seconds"].mean(),
+                         "trial_seconds": perf_counter() - t0})
+    trials = pd.DataFrame(rows).sort_values("mae", kind="stable").reset_index(drop=True)
+
+    best = todo[int(trials.loc[0, "trial"])]
+    model = RandomForestRegressor(**best, random_state=seed, n_jobs=n_jobs).fit(Xt, y)
+    pipe = Pipeline([("prep", prep), ("model", model)])
+
+    top = trials.iloc[0]
+    metrics = {"mae": float(top["mae"]), "rmse": float(top["rmse"]), "r2": float(top["r2"]),
+               "cv_folds": cv, "n_train": int(len(y))}
+    info = {"mode": mode, "best_params": best, "trials_run": len(rows),
+            "trials_planned": len(todo), "budget_s": budget_s,
+            "stopped_by_budget": len(rows) < len(todo),
+            "fingerprint": data_fingerprint(df), "prep_cache_hit": hit,
+            "prep_seconds": t_prep, "search_seconds": perf_counter() - t_start}
+    return pipe, metrics, trials, info
+
+
+def trials_path_for(model_path) -> Path:
+    p = Path(model_path)
+    return p.with_suffix(p.suffix + ".trials.csv")
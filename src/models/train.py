@@ -9,11 +9,13 @@ import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
+from src import profiling
+
 TARGET = "price"
 NUMERIC = [
     "accommodates", "bedrooms", "bathrooms_num",
@@ -22,6 +24,7 @@ NUMERIC = [
 ]
 CATEGORICAL = ["room_type", "neighbourhood"]
 FEATURES = CATEGORICAL + NUMERIC
+ENGINES = ["rf", "hgb"]   # RandomForest on one-hot | histogram gradient boosting
 
 def _make_preprocessor() -> ColumnTransformer:
     num_pipe = Pipeline([
@@ -35,7 +38,30 @@ def _make_preprocessor() -> ColumnTransformer:
     return ColumnTransformer([("num", num_pipe, NUMERIC),
                               ("cat", cat_pipe, CATEGORICAL)])
 
-def train_on_df(df: pd.DataFrame):
+def _make_hgb_preprocessor() -> ColumnTransformer:
+    # categories -> integer codes (unknown/missing -> NaN, which HGB handles natively);
+    # numerics pass through unscaled. Codes stay below HGB's 255-bin limit.
+    ordinal = OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=np.nan,
+                             encoded_missing_value=np.nan, max_categories=254)
+    return ColumnTransformer([("cat", ordinal, CATEGORICAL),
+                              ("num", "passthrough", NUMERIC)])
+
+def make_pipeline(engine: str = "rf") -> Pipeline:
+    if engine == "rf":
+        return Pipeline([
+            ("prep", _make_preprocessor()),
+            ("model", RandomForestRegressor(n_estimators=300, random_state=42, n_jobs=-1)),
+        ])
+    if engine == "hgb":
+        cat_idx = list(range(len(CATEGORICAL)))   # ColumnTransformer puts "cat" first
+        return Pipeline([
+            ("prep", _make_hgb_preprocessor()),
+            ("model", HistGradientBoostingRegressor(categorical_features=cat_idx,
+                                                    max_iter=300, random_state=42)),
+        ])
+    raise ValueError(f"Unknown engine: {engine!r} (expected one of {ENGINES})")
+
+def train_on_df(df: pd.DataFrame, engine: str = "rf"):
     missing = [c for c in FEATURES + [TARGET] if c not in df.columns]
     if missing:
         raise KeyError(f"Missing columns: {missing}")
@@ -45,12 +71,11 @@ def train_on_df(df: pd.DataFrame):
 
     X_tr, X_va, y_tr, y_va = train_test_split(X, y, test_size=0.2, random_state=42)
 
-    pipe = Pipeline([
-        ("prep", _make_preprocessor()),
-        ("model", RandomForestRegressor(n_estimators=300, random_state=42, n_jobs=-1)),
-    ])
-    pipe.fit(X_tr, y_tr)
-    pred = pipe.predict(X_va)
+    pipe = make_pipeline(engine)
+    with profiling.stage("fit"):
+        pipe.fit(X_tr, y_tr)
+    with profiling.stage("predict"):
+        pred = pipe.predict(X_va)
 
     mae = float(mean_absolute_error(y_va, pred))
     rmse = float(np.sqrt(mean_squared_error(y_va, pred)))
@@ -76,13 +101,67 @@ def main():
     ap = argparse.ArgumentParser(description="Train baseline Airbnb price model")
     ap.add_argument("--data", default="data/berlin_clean.csv")
     ap.add_argument("--out", default="models/baseline.joblib")
+    ap.add_argument("--compile", action="store_true",
+                    help="Also export NumPy node arrays for the API (<out>.compiled/)")
+    ap.add_argument("--engine", choices=ENGINES, default="rf",
+                    help="rf: RandomForest on one-hot (default); hgb: HistGradientBoosting "
+                         "with native categoricals")
+    ap.add_argument("--city", default="berlin",
+                    help="City recorded in the meta (the API serves models by ?city=)")
+    ap.add_argument("--search", choices=["grid", "random"],
+                    help="Cross-validated hyperparameter search instead of the fixed model")
+    ap.add_argument("--trials", type=int, default=20, help="Candidates for --search random")
+    ap.add_argument("--cv", type=int, default=5)
+    ap.add_argument("--budget-s", type=float, default=None,
+                    help="Stop starting new trials after this many seconds")
+    ap.add_argument("--jobs", type=int, default=-1, help="Parallel CV folds")
+    profiling.add_argument(ap)
     args = ap.parse_args()
 
-    df = load_data(args.data)
-    pipe, metrics = train_on_df(df)
+    if args.search and args.engine != "rf":
+        ap.error("--search tunes the rf engine only")
+
+    profiling.start("train", args.profile)
+    try:
+        _run(args)
+    finally:
+        profiling.finish()
+
+def _run(args):
+    with profiling.stage("load"):
+        df = load_data(args.data)
+    if args.search:
+        from src.models.search import search, trials_path_for
+        with profiling.stage("fit"):
+            pipe, metrics, trials, info = search(df, args.search, args.trials, args.cv,
+                                                 args.budget_s, args.jobs)
+        print(f"Ran {info['trials_run']}/{info['trials_planned']} trials in "
+              f"{info['search_seconds']:.1f}s (preprocessing cache "
+              f"{'hit' if info['prep_cache_hit'] else 'miss'}); best: {info['best_params']}")
+        with profiling.stage("write"):
+            save_model(pipe, args.out, {"metrics": metrics, "engine": "rf", "search": info,
+                                        "city": args.city})
+            trials.to_csv(trials_path_for(args.out), index=False)
+        print(f"Saved trial table to {trials_path_for(args.out)}")
+    else:
+        pipe, metrics = train_on_df(df, args.engine)
+        with profiling.stage("write"):
+            save_model(pipe, args.out, {"metrics": metrics, "engine": args.engine,
+                                        "city": args.city})
     print("Metrics:", metrics)
-    save_model(pipe, args.out, {"metrics": metrics})
     print(f"Saved model to {args.out}")
+    from src.models.price_index import build_index, index_path_for, save_index
+    with profiling.stage("write"):
+        index = save_index(build_index(df), index_path_for(args.out))
+    print(f"Saved price index to {index}")
+    if args.compile:
+        from src.models.compile import compile_pipeline, compiled_path_for, save_compiled
+        try:
+            with profiling.stage("write"):
+                out = save_compiled(compile_pipeline(pipe), compiled_path_for(args.out))
+            print(f"Saved compiled model to {out}")
+        except ValueError as e:
+            print(f"Skipping --compile: {e}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
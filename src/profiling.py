@@ -0,0 +1,184 @@
+"""Opt-in CPU and memory profiling for the pipeline CLIs (`--profile`).
+
+The entry points mark their stages (load, clean, fit, predict, write) with
+`stage(name)` blocks or `iterate(name, chunks)` for streamed input. Time is
+charged to the innermost open stage, so a write loop that pulls chunks from
+a reader counts the reading as "load" and only the rest as "write". With
+profiling on, each stage also gets its tracemalloc peak (Python
+allocations) and RSS peak, the whole run is recorded with cProfile, and
+`finish()` writes
+
+    reports/profile_<command>_<timestamp>.json   stages, peaks, top functions
+    reports/profile_<command>_<timestamp>.prof   cProfile dump (snakeviz, pstats)
+
+Only the main process is profiled; pool workers are counted as waiting time
+of the stage that waits for them. Without `--profile` a stage is a
+`nullcontext` and `iterate` returns its input unchanged.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+TOP_FUNCTIONS = 25
+
+_active: "Profiler | None" = None
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident memory of this process so far (None on Windows)."""
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _rss_mb() -> float | None:
+    """Current resident memory (Linux), else the peak so far."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+class Profiler:
+    def __init__(self, command: str, out_dir="reports"):
+        self.command = command
+        self.out_dir = Path(out_dir)
+        self.stages: dict[str, dict] = {}
+        self._stack: list[str] = []
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        tracemalloc.start()
+        self._t0 = self._t_switch = perf_counter()
+        self.started = datetime.now()
+        self._profile.enable()
+        return self
+
+    def _switch(self):
+        """Charge the time and memory since the last switch to the innermost stage."""
+        now = perf_counter()
+        if self._stack:
+            s = self.stages[self._stack[-1]]
+            s["seconds"] += now - self._t_switch
+            s["tracemalloc_peak_mb"] = max(s["tracemalloc_peak_mb"],
+                                           tracemalloc.get_traced_memory()[1] / 2**20)
+            rss = _rss_mb()
+            if rss is not None:
+                s["rss_peak_mb"] = max(s["rss_peak_mb"] or 0.0, rss)
+        tracemalloc.reset_peak()
+        self._t_switch = now
+
+    @contextmanager
+    def stage(self, name: str):
+        self._switch()
+        s = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0,
+                                          "tracemalloc_peak_mb": 0.0, "rss_peak_mb": None})
+        s["calls"] += 1
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    def iterate(self, name: str, iterable):
+        it = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def finish(self) -> Path:
+        """Stop profiling and write the JSON report and cProfile dump; returns the JSON path."""
+        self._profile.disable()
+        wall = perf_counter() - self._t0
+        tracemalloc.stop()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.out_dir / f"profile_{self.command}_{self.started:%Y%m%d-%H%M%S}"
+        prof_path = stem.with_suffix(".prof")
+        self._profile.dump_stats(prof_path)
+
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        rows = []
+        for (file, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({"function": f"{Path(file).name}:{line}({func})", "calls": nc,
+                         "tottime": round(tt, 6), "cumtime": round(ct, 6)})
+        rows.sort(key=lambda r: r["cumtime"], reverse=True)
+        staged = sum(s["seconds"] for s in self.stages.values())
+        report = {
+            "command": self.command, "argv": sys.argv[1:],
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_seconds": round(wall, 6),
+            "unstaged_seconds": round(max(wall - staged, 0.0), 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {k: {**v, "seconds": round(v["seconds"], 6)}
+                       for k, v in self.stages.items()},
+            "top_functions": rows[:TOP_FUNCTIONS],
+            "cprofile": str(prof_path),
+        }
+        json_path = stem.with_suffix(".json")
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        return json_path
+
+
+# ---------- module-level API used by the CLIs ----------
+
+def add_argument(parser):
+    parser.add_argument("--profile", nargs="?", const="reports", default=None, metavar="DIR",
+                        help="Record time, memory and a cProfile dump per stage "
+                             "(report under DIR, default reports/)")
+
+
+def start(command: str, out_dir: str | None) -> Profiler | None:
+    """Start profiling if `out_dir` is set (the `--profile` value); no-op otherwise."""
+    global _active
+    if out_dir is None:
+        return None
+    _active = Profiler(command, out_dir).start()
+    return _active
+
+
+def stage(name: str):
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def iterate(name: str, iterable):
+    return _active.iterate(name, iterable) if _active is not None else iterable
+
+
+def reset():
+    """Drop a profiler inherited by a forked pool worker (only the parent reports)."""
+    global _active
+    if _active is not None:
+        _active._profile.disable()
+        _active = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def finish():
+    global _active
+    if _active is None:
+        return None
+    prof, _active = _active, None
+    path = prof.finish()
+    parts = ", ".join(f"{k} {v['seconds']:.2f}s" for k, v in prof.stages.items())
+    print(f"Profile: {parts} -> {path}")
+    return path
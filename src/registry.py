@@ -0,0 +1,174 @@
+"""Serve several cities / model versions from one process.
+
+`ModelRegistry` scans a models directory for `.joblib` artifacts (and
+compiled-only `.joblib.compiled/` directories) with their `.meta.json`, and
+loads one the first time a request asks for its city/version. Loaded models
+are kept in an LRU bounded by a memory budget (`LoadedModel.nbytes`); the
+least recently used ones are dropped when a new load would exceed it.
+
+An artifact's city is `meta["city"]`, else the name of its sub-directory
+(`models/<city>/...`), else `default_city`; its version is `meta["version"]`,
+else the file name without `.joblib`. Without a version, a city's newest
+artifact (by `meta["created"]`) is served.
+
+A lookup that finds nothing rescans the directory, at most once every
+`rescan_s` seconds, so requests for unknown cities do not walk the tree each
+time. The app's default model is handed in with `share()` and served for
+its artifact instead of loading a second copy.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from time import monotonic, time
+
+from src.model_store import LoadedModel, load_model, read_meta
+from src.models.compile import SPEC_FILE
+
+SUFFIX = ".joblib"
+
+
+class Artifact:
+    def __init__(self, city: str, version: str, model_path: Path, meta: dict):
+        self.city, self.version = city, version
+        self.model_path = model_path
+        self.meta = meta
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.city, self.version
+
+    @property
+    def meta_path(self) -> Path:
+        return self.model_path.with_name(self.model_path.name + ".meta.json")
+
+
+class ModelRegistry:
+    def __init__(self, root="models", budget_mb: float = 1024, default_city: str = "berlin",
+                 load=load_model, rescan_s: float = 30.0):
+        self.root = Path(root)
+        self.budget_bytes = int(budget_mb * 2**20)
+        self.default_city = default_city.lower()
+        self.load = load
+        self.rescan_s = rescan_s
+        self.artifacts: dict[tuple[str, str], Artifact] = {}
+        self.loads = self.evictions = 0
+        self._loaded: OrderedDict[tuple[str, str], LoadedModel] = OrderedDict()
+        self._last_used: dict[tuple[str, str], float] = {}
+        self._loading: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._scanned_at = float("-inf")
+        self._shared: tuple[Path, LoadedModel] | None = None
+        self.scan()
+
+    # ---------- discovery ----------
+
+    def scan(self) -> dict[tuple[str, str], Artifact]:
+        """Re-read the models directory (hidden directories such as caches are skipped)."""
+        found: dict[tuple[str, str], Artifact] = {}
+        if self.root.is_dir():
+            paths = {p for p in self.root.rglob(f"*{SUFFIX}") if p.is_file()}
+            # compiled-only artifacts: <name>.joblib.compiled/spec.json without <name>.joblib
+            paths |= {p.parent.with_suffix("")
+                      for p in self.root.rglob(f"*{SUFFIX}.compiled/{SPEC_FILE}")}
+            for path in sorted(paths):
+                rel = path.relative_to(self.root)
+                if any(part.startswith(".") for part in rel.parts):
+                    continue
+                meta = read_meta(path.with_name(path.name + ".meta.json"))
+                city = meta.get("city") or (rel.parts[0] if len(rel.parts) > 1
+                                            else self.default_city)
+                version = meta.get("version") or path.name[:-len(SUFFIX)]
+                art = Artifact(str(city).lower(), str(version), path, meta)
+                found.setdefault(art.key, art)
+        with self._lock:
+            self.artifacts = found
+            self._scanned_at = monotonic()
+        return found
+
+    def resolve(self, city: str | None = None, version: str | None = None) -> Artifact:
+        """Artifact for a city (default city if None) and version (newest if None)."""
+        city = (city or self.default_city).lower()
+        for attempt in range(2):
+            matches = [a for a in self.artifacts.values() if a.city == city
+                       and (version is None or a.version == str(version))]
+            if matches:
+                return max(matches, key=lambda a: (str(a.meta.get("created", "")), a.version))
+            if attempt == 0 and monotonic() - self._scanned_at >= self.rescan_s:
+                self.scan()   # a model may have been added since the last scan
+        what = f"city '{city}'" + (f", version '{version}'" if version is not None else "")
+        raise KeyError(f"No model for {what}")
+
+    # ---------- loading ----------
+
+    def share(self, model: LoadedModel | None):
+        """Serve `model` (the app's default) for the artifact at its path."""
+        with self._lock:
+            self._shared = None if model is None else (Path(model.path).resolve(), model)
+
+    def _shared_for(self, art: Artifact) -> LoadedModel | None:
+        shared = self._shared
+        if shared is not None and art.model_path.resolve() == shared[0]:
+            return shared[1]
+        return None
+
+    def get(self, city: str | None = None, version: str | None = None) -> LoadedModel:
+        """Loaded model for city/version; loads it (and evicts cold ones) on a miss.
+
+        Raises KeyError when no such artifact exists.
+        """
+        art = self.resolve(city, version)
+        model = self._shared_for(art) or self._touch(art.key)
+        if model is not None:
+            return model
+        with self._lock:
+            key_lock = self._loading.setdefault(art.key, threading.Lock())
+        # one load per cold model; requests for other (loaded) models are not blocked
+        with key_lock:
+            model = self._touch(art.key)
+            if model is None:
+                model = self.load(art.model_path, art.meta_path).warm_up()
+                with self._lock:
+                    self.loads += 1
+                    self._loaded[art.key] = model
+                    self._last_used[art.key] = time()
+                    self._evict(keep=art.key)
+        return model
+
+    def _touch(self, key) -> LoadedModel | None:
+        with self._lock:
+            model = self._loaded.get(key)
+            if model is not None:
+                self._loaded.move_to_end(key)
+                self._last_used[key] = time()
+            return model
+
+    def _evict(self, keep):
+        """Drop least recently used models until the budget holds (never `keep`)."""
+        used = sum(m.nbytes for m in self._loaded.values())
+        for key in [k for k in self._loaded if k != keep]:
+            if used <= self.budget_bytes:
+                break
+            used -= self._loaded.pop(key).nbytes
+            self._last_used.pop(key, None)
+            self.evictions += 1
+        if used > self.budget_bytes:
+            print(f"Model {keep} alone exceeds the {self.budget_bytes / 2**20:.0f} MB budget")
+
+    # ---------- reporting ----------
+
+    def status(self) -> dict:
+        with self._lock:
+            loaded = [{"city": k[0], "version": k[1], "kind": m.kind, "path": m.path,
+                       "memory_mb": round(m.nbytes / 2**20, 3),
+                       "load_seconds": m.load_seconds, "last_used": self._last_used.get(k)}
+                      for k, m in reversed(self._loaded.items())]   # most recent first
+            available = [{"city": a.city, "version": a.version, "path": str(a.model_path),
+                          "created": a.meta.get("created"),
+                          "loaded": a.key in self._loaded or self._shared_for(a) is not None}
+                         for a in sorted(self.artifacts.values(), key=lambda a: a.key)]
+        return {"budget_mb": self.budget_bytes / 2**20,
+                "loaded_mb": round(sum(m["memory_mb"] for m in loaded), 3),
+                "loads": self.loads, "evictions": self.evictions,
+                "loaded": loaded, "available": available}
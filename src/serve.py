@@ -0,0 +1,135 @@
+"""Serve the API from workers forked after the model is loaded (preload-then-fork).
+
+`uvicorn --workers N` starts N fresh interpreters, and each one imports the
+app and loads and warms the model on its own. Here the parent does that once
+(`src.app.preload`: model, price index, pandas and the bulk path), binds the
+socket and then forks the workers. They start ready to answer, and share the
+parent's model pages copy-on-write. A worker that dies is forked again from
+the same warm parent.
+
+    python -m src.serve --workers 4 --port 8000
+    MODEL_PATH=models/baseline.joblib python -m src.serve --workers 2
+
+Needs `os.fork` (Linux/macOS). Hot reload still works: each worker starts its
+own file watcher after the fork, and a reloaded model is private to the
+worker that loaded it.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+from time import monotonic, sleep
+
+# a worker that exits sooner than this after its fork counts as a crash loop
+MIN_WORKER_LIFETIME_S = 5.0
+
+
+def bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, log_level: str, access_log: bool):
+    import uvicorn
+
+    from src import app as app_mod
+
+    # the parent's SIGTERM/SIGINT handlers must not run in the worker; uvicorn installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app_mod.app, log_level=log_level, access_log=access_log)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _fork_worker(sock, log_level: str, access_log: bool) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(sock, log_level, access_log)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = 1,
+          log_level: str = "info", access_log: bool = True) -> int:
+    """Preload, fork `workers` and supervise them until SIGTERM/SIGINT; returns an exit code."""
+    from src import app as app_mod
+
+    app_mod.preload()
+    sock = bind(host, port)
+    gc.collect()
+    gc.freeze()   # keep the preloaded objects out of the workers' GC passes (fewer COW copies)
+    print(f"Serving on http://{host}:{port} with {workers} preloaded worker(s)")
+
+    children: dict[int, float] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        children[_fork_worker(sock, log_level, access_log)] = monotonic()
+
+    code = 0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        exit_code = os.waitstatus_to_exitcode(status)
+        if monotonic() - started < MIN_WORKER_LIFETIME_S:
+            print(f"Worker {pid} exited with {exit_code} right after starting; shutting down")
+            code = 1
+            stop(None, None)
+            continue
+        print(f"Worker {pid} exited with {exit_code}; forking a new one")
+        sleep(0.1)
+        children[_fork_worker(sock, log_level, access_log)] = monotonic()
+    sock.close()
+    return code
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve the API from preloaded, forked workers.")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    ap.add_argument("--log-level", default="info")
+    ap.add_argument("--no-access-log", action="store_true")
+    args = ap.parse_args()
+    if not hasattr(os, "fork"):
+        sys.exit("src.serve needs os.fork; use `uvicorn src.app:app --workers N` instead")
+    sys.exit(serve(args.host, args.port, max(args.workers, 1), args.log_level,
+                   not args.no_access_log))
+
+
+if __name__ == "__main__":
+    main()
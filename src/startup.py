@@ -0,0 +1,72 @@
+"""Startup timeline of the API process.
+
+Phases are recorded as seconds since the process started (read from
+/proc on Linux, so interpreter start-up and imports are included):
+
+    imported           src.app and its dependencies are imported
+    loaded             the default model (and price index) is loaded
+    ready              the model answered its warm-up prediction; /ready is green
+    first_prediction   the first request answered with a model prediction
+
+Each phase is recorded once per process; hot reloads do not move them. A
+worker forked from a preloaded parent (`src.serve`) inherits the parent's
+timeline, so its phases count from the parent's start.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from time import time
+
+
+def _process_start() -> float:
+    """Unix time at which this process started (import time where /proc is missing)."""
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])   # field 22, starttime
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time() - (uptime - ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time()
+
+
+PROCESS_START = _process_start()
+PHASES = ("imported", "loaded", "ready", "first_prediction")
+
+
+class Timeline:
+    def __init__(self, started: float = PROCESS_START):
+        self.started = started
+        self.phases: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def on_mark(self, callback):
+        """Call `callback(phase, seconds)` for every phase recorded from now on."""
+        self._callbacks.append(callback)
+
+    def mark(self, phase: str) -> bool:
+        """Record `phase` now unless it is already recorded; True if this call did."""
+        if phase in self.phases:   # fast path: every prediction checks first_prediction
+            return False
+        with self._lock:
+            if phase in self.phases:
+                return False
+            self.phases[phase] = seconds = time() - self.started
+        for callback in self._callbacks:
+            callback(phase, seconds)
+        return True
+
+    @property
+    def ready(self) -> bool:
+        return "ready" in self.phases
+
+    def uptime(self) -> float:
+        return time() - self.started
+
+    def report(self) -> dict:
+        return {p: round(self.phases[p], 4) for p in PHASES if p in self.phases}
+
+
+timeline = Timeline()
@@ -0,0 +1,50 @@
+"""Synthetic Berlin listings for tests and benchmarks.
+
+`dummy_df` gives cleaned feature rows with a price that depends on size and
+room type plus noise; `synthetic_dump` writes the same rows back in the raw
+InsideAirbnb column formats (`$1,234.00`, `1.5 baths`) with an `id`.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def dummy_df(n: int = 150, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "room_type": rng.choice(["Entire home/apt", "Private room", "Shared room"], size=n),
+        "neighbourhood": rng.choice(["Mitte", "Friedrichshain", "Kreuzberg"], size=n),
+        "accommodates": rng.integers(1, 6, size=n),
+        "bedrooms": rng.integers(0, 3, size=n),
+        "bathrooms_num": rng.choice([0.5, 1.0, 1.5, 2.0], size=n),
+        "minimum_nights": rng.integers(1, 7, size=n),
+        "number_of_reviews": rng.integers(0, 50, size=n),
+        "reviews_per_month": rng.random(n) * 5,
+        "availability_365": rng.integers(0, 365, size=n),
+    })
+    base = 40 + 15*df["accommodates"] + 10 * \
+        df["bedrooms"] + 8*df["bathrooms_num"]
+    room_adj = df["room_type"].map(
+        {"Entire home/apt": 40, "Private room": 0, "Shared room": -10})
+    noise = rng.normal(0, 10, size=n)
+    df["price"] = (base + room_adj + noise).clip(20, 500)
+    return df
+
+
+def synthetic_dump(n: int, seed: int = 0) -> pd.DataFrame:
+    """`dummy_df` rows written back in the raw InsideAirbnb column formats."""
+    df = dummy_df(n, seed)
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "room_type": df["room_type"],
+        "neighbourhood_cleansed": df["neighbourhood"],
+        "accommodates": df["accommodates"],
+        "bedrooms": df["bedrooms"],
+        "bathrooms_text": [f"{b:g} bath" + ("s" if b != 1 else "") for b in df["bathrooms_num"]],
+        "minimum_nights": df["minimum_nights"],
+        "number_of_reviews": df["number_of_reviews"],
+        "reviews_per_month": df["reviews_per_month"],
+        "availability_365": df["availability_365"],
+        "price": [f"${p:,.2f}" for p in df["price"]],
+    })
@@ -0,0 +1,349 @@
+import io
+import threading
+import time
+from fastapi.testclient import TestClient
+import numpy as np
+import pandas as pd
+from src import app as app_mod
+from src.batching import MicroBatcher
+from src.cache import PredictionCache
+from src.model_store import LoadedModel, load_model
+from src.models.compile import compile_pipeline
+from src.models.train import train_on_df, save_model
+from src.synthetic import dummy_df
+
+PARAMS = {
+    "room_type": "Entire home/apt", "neighbourhood": "Mitte", "accommodates": 2,
+    "bedrooms": 1.0, "bathrooms_num": 1.0, "minimum_nights": 2,
+    "number_of_reviews": 10, "reviews_per_month": 0.3, "availability_365": 120,
+}
+
+
+def test_predict_demo_without_model(monkeypatch):
+    monkeypatch.setattr(app_mod, "loaded", None)
+    r = TestClient(app_mod.app).get("/predict", params=PARAMS)
+    assert r.status_code == 200
+    assert r.json() == {"predicted_price_demo": 135.0}
+
+
+def test_predict_batched_matches_unbatched(monkeypatch):
+    pipe, _ = train_on_df(dummy_df())
+    monkeypatch.setattr(app_mod, "loaded", LoadedModel("m", {}, engine=compile_pipeline(pipe)))
+    client = TestClient(app_mod.app)
+
+    monkeypatch.setattr(app_mod, "batcher", None)
+    unbatched = client.get("/predict", params=PARAMS).json()
+    monkeypatch.setattr(app_mod, "batcher", MicroBatcher(app_mod._predict_rows, 8, 1))
+    batched = client.get("/predict", params=PARAMS).json()
+    assert batched == unbatched
+    expected = pipe.predict(pd.DataFrame([PARAMS]))[0]
+    assert np.isclose(unbatched["predicted_price"], expected, atol=0.005)
+
+
+def test_predict_cache_hits_and_stats(monkeypatch):
+    class CountingModel:
+        calls = 0
+
+        def predict(self, X):
+            CountingModel.calls += 1
+            return np.full(len(X), 100.0)
+
+    meta = {"created": "2025-01-01T00:00:00"}
+    monkeypatch.setattr(app_mod, "loaded", LoadedModel("m", meta, model=CountingModel()))
+    monkeypatch.setattr(app_mod, "batcher", None)
+    monkeypatch.setattr(app_mod, "cache", PredictionCache(max_size=10))
+    client = TestClient(app_mod.app)
+
+    client.get("/predict", params=PARAMS)
+    client.get("/predict", params={**PARAMS, "bedrooms": "1"})    # same listing, 1 vs 1.0
+    assert CountingModel.calls == 1
+    stats = client.get("/cache_stats").json()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_predict_cache_skips_rows_scored_across_a_reload(monkeypatch):
+    class FixedModel:
+        def __init__(self, price):
+            self.price = price
+
+        def predict(self, X):
+            return np.full(len(X), self.price)
+
+    new = LoadedModel("m", {"created": "2025-02-01T00:00:00"}, model=FixedModel(200.0))
+
+    class ReloadingModel(FixedModel):
+        def predict(self, X):
+            app_mod.loaded = new        # hot reload while the batch is in flight
+            return new.model.predict(X)
+
+    old = LoadedModel("m", {"created": "2025-01-01T00:00:00"}, model=ReloadingModel(100.0))
+    monkeypatch.setattr(app_mod, "loaded", old)
+    monkeypatch.setattr(app_mod, "batcher", MicroBatcher(app_mod._predict_rows, 8, 1))
+    monkeypatch.setattr(app_mod, "cache", PredictionCache(max_size=10))
+    client = TestClient(app_mod.app)
+
+    assert client.get("/predict", params=PARAMS).json() == {"predicted_price": 200.0}
+    assert app_mod.cache.stats()["size"] == 0      # not stored under the old version
+    client.get("/predict", params=PARAMS)
+    assert app_mod.cache.get(dict(PARAMS), new.version) == 200.0
+
+
+def test_reload_without_meta_invalidates_cache(tmp_path, monkeypatch):
+    import os
+    import joblib
+    out = tmp_path / "baseline.joblib"
+    pipe, _ = train_on_df(dummy_df())
+    joblib.dump(pipe, out)                       # no .meta.json next to it
+    monkeypatch.setattr(app_mod, "loaded", None)
+    monkeypatch.setattr(app_mod, "batcher", None)
+    monkeypatch.setattr(app_mod, "cache", PredictionCache(max_size=10))
+    monkeypatch.setattr(app_mod, "MODEL_PATH", str(out))
+    monkeypatch.setattr(app_mod, "META_PATH", str(out) + ".meta.json")
+    monkeypatch.setattr(app_mod, "COMPILED_PATH", str(out) + ".compiled")
+    client = TestClient(app_mod.app)
+
+    app_mod._load()
+    first = client.get("/predict", params=PARAMS).json()["predicted_price"]
+    df = dummy_df()
+    pipe2, _ = train_on_df(df.assign(price=df["price"] * 3))
+    joblib.dump(pipe2, out)
+    st = out.stat()
+    os.utime(out, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    app_mod._load()
+    second = client.get("/predict", params=PARAMS).json()["predicted_price"]
+    assert app_mod.loaded.version is not None and second != first
+    assert np.isclose(second, pipe2.predict(pd.DataFrame([PARAMS]))[0], atol=0.005)
+
+
+def _wait_ready(client, timeout=30.0):
+    # model_loaded too: the timeline is per process, so an earlier test may have marked it
+    deadline = time.monotonic() + timeout
+    while not client.get("/ready").json()["model_loaded"]:
+        assert time.monotonic() < deadline, "model did not load"
+        time.sleep(0.01)
+
+
+def test_lifespan_loads_and_warms_model(tmp_path, monkeypatch):
+    pipe, metrics = train_on_df(dummy_df())
+    out = tmp_path / "baseline.joblib"
+    save_model(pipe, out, {"metrics": metrics})
+    monkeypatch.setattr(app_mod, "loaded", None)
+    monkeypatch.setattr(app_mod, "MODEL_PATH", str(out))
+    monkeypatch.setattr(app_mod, "META_PATH", str(out) + ".meta.json")
+    monkeypatch.setattr(app_mod, "COMPILED_PATH", str(out) + ".compiled")
+    monkeypatch.setattr(app_mod, "MODEL_RELOAD_INTERVAL_S", 0)
+
+    with TestClient(app_mod.app) as client:
+        _wait_ready(client)
+        info = client.get("/model_info").json()
+        assert info["loaded"] and info["kind"] == "compiled"
+        assert info["warmup_seconds"] > 0
+        r = client.get("/predict", params=PARAMS)
+    assert np.isclose(r.json()["predicted_price"], pipe.predict(pd.DataFrame([PARAMS]))[0],
+                      atol=0.005)
+
+
+def _batch_client(monkeypatch, chunk_rows=7):
+    pipe, _ = train_on_df(dummy_df())
+    monkeypatch.setattr(app_mod, "loaded", LoadedModel("m", {}, engine=compile_pipeline(pipe)))
+    monkeypatch.setattr(app_mod, "batcher", None)
+    monkeypatch.setattr(app_mod, "cache", None)
+    monkeypatch.setattr(app_mod, "BULK_CHUNK_ROWS", chunk_rows)
+    monkeypatch.setattr(app_mod, "UPLOAD_WRITE_BYTES", 256)   # body spooled in pieces
+    return TestClient(app_mod.app)
+
+
+def test_predict_batch_formats_match_single_predict(monkeypatch):
+    import io
+    import pyarrow as pa
+    client = _batch_client(monkeypatch)
+    rows = dummy_df(20, seed=3).drop(columns=["price"])
+    rows.insert(0, "id", range(100, 120))
+    single = [client.get("/predict", params=r).json()["predicted_price"]
+              for r in rows.drop(columns=["id"]).to_dict("records")]
+
+    r = client.post("/predict_batch", content=rows.to_csv(index=False),
+                    headers={"content-type": "text/csv"})
+    out = pd.read_csv(io.StringIO(r.text))
+    assert list(out["id"]) == list(rows["id"]) and list(out["predicted_price"]) == single
+
+    r = client.post("/predict_batch", content=rows.to_json(orient="records", lines=True),
+                    headers={"content-type": "application/x-ndjson"})
+    assert list(pd.read_json(io.StringIO(r.text), lines=True)["predicted_price"]) == single
+
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(rows, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as w:
+        w.write_table(table)
+    r = client.post("/predict_batch", content=sink.getvalue(),
+                    headers={"content-type": "application/vnd.apache.arrow.stream"})
+    out = pa.ipc.open_stream(io.BytesIO(r.content)).read_all().to_pandas()
+    assert list(out["predicted_price"]) == single
+
+    r = client.post("/predict_batch", json=rows.head(3).drop(columns=["id"]).to_dict("records"))
+    assert r.json() == {"predicted_prices": single[:3]}
+    assert client.post("/predict_batch", json=[]).json() == {"predicted_prices": []}
+
+
+def test_predict_batch_validates_columns(monkeypatch):
+    client = _batch_client(monkeypatch, chunk_rows=5)
+    rows = dummy_df(12).drop(columns=["price"])
+    csv = lambda df: {"content": df.to_csv(index=False), "headers": {"content-type": "text/csv"}}
+
+    r = client.post("/predict_batch", **csv(rows.drop(columns=["bedrooms"])))
+    assert r.status_code == 422 and "bedrooms" in r.json()["detail"]
+    bad = rows.astype({"accommodates": object})
+    bad.loc[2, "accommodates"] = "two"
+    r = client.post("/predict_batch", **csv(bad))
+    assert r.status_code == 422 and "accommodates" in r.json()["detail"]
+    # a bad value past the first chunk ends the stream with an error trailer
+    bad = rows.astype({"accommodates": object})
+    bad.loc[11, "accommodates"] = "two"
+    r = client.post("/predict_batch", **csv(bad))
+    assert r.status_code == 200 and r.text.splitlines()[-1].startswith("# error:")
+    assert len(r.text.splitlines()) == 1 + 10 + 1
+
+
+def test_ready_turns_green_after_load_and_reports_first_prediction(tmp_path, monkeypatch):
+    from src.startup import Timeline
+    pipe, metrics = train_on_df(dummy_df())
+    out = tmp_path / "baseline.joblib"
+    save_model(pipe, out, {"metrics": metrics})
+    timeline = Timeline()
+    timeline.on_mark(app_mod._startup_phase)
+    monkeypatch.setattr(app_mod, "timeline", timeline)
+    monkeypatch.setattr(app_mod, "loaded", None)
+    monkeypatch.setattr(app_mod, "MODEL_PATH", str(out))
+    monkeypatch.setattr(app_mod, "META_PATH", str(out) + ".meta.json")
+    monkeypatch.setattr(app_mod, "COMPILED_PATH", str(out) + ".compiled")
+    monkeypatch.setattr(app_mod, "MODEL_RELOAD_INTERVAL_S", 0)
+
+    # the load runs in the background: liveness is served while readiness is red
+    release = threading.Event()
+
+    def slow_load(*args, **kwargs):
+        release.wait(30)
+        return load_model(*args, **kwargs)
+
+    monkeypatch.setattr(app_mod, "load_model", slow_load)
+    with TestClient(app_mod.app) as client:
+        assert client.get("/health").status_code == 200
+        r = client.get("/ready")
+        assert r.status_code == 503 and r.json()["ready"] is False
+        assert client.get("/predict", params=PARAMS).status_code == 503   # not demo prices
+        release.set()
+        _wait_ready(client)
+        r = client.get("/ready")
+        assert r.status_code == 200 and r.json()["model_loaded"]
+        assert list(r.json()["startup_seconds"]) == ["loaded", "ready"]
+        client.get("/predict", params=PARAMS)
+        client.get("/predict", params={**PARAMS, "accommodates": 3})
+        text = client.get("/metrics").text
+    first = timeline.phases["first_prediction"]
+    assert 0 < timeline.phases["loaded"] <= timeline.phases["ready"] <= first
+    line = next(l for l in text.splitlines()
+                if l.startswith("airbnb_time_to_first_prediction_seconds "))
+    assert np.isclose(float(line.split()[1]), first, atol=1e-3)
+    assert 'airbnb_startup_seconds{phase="ready"}' in text
+
+
+def test_metrics_endpoint_exposes_stages_and_model(tmp_path, monkeypatch):
+    pipe, metrics = train_on_df(dummy_df())
+    out = tmp_path / "baseline.joblib"
+    save_model(pipe, out, {"metrics": metrics})
+    monkeypatch.setattr(app_mod, "loaded", None)
+    monkeypatch.setattr(app_mod, "batcher", None)
+    monkeypatch.setattr(app_mod, "MODEL_PATH", str(out))
+    monkeypatch.setattr(app_mod, "META_PATH", str(out) + ".meta.json")
+    monkeypatch.setattr(app_mod, "COMPILED_PATH", str(out) + ".compiled")
+    monkeypatch.setattr(app_mod, "MODEL_RELOAD_INTERVAL_S", 0)
+
+    with TestClient(app_mod.app) as client:
+        _wait_ready(client)
+        client.get("/predict", params=PARAMS)
+        text = client.get("/metrics").text
+    for stage in ("validation", "preprocess", "model"):
+        assert f'stage="{stage}"' in text
+    assert 'airbnb_requests_total{endpoint="/predict",method="GET",status="200"}' in text
+    assert f'airbnb_model_info{{version="{app_mod.loaded.version}",kind="compiled"' in text
+
+    monkeypatch.setattr(app_mod, "METRICS", False)
+    assert TestClient(app_mod.app).get("/metrics").status_code == 404
+
+
+def test_predict_by_city_uses_registry(tmp_path, monkeypatch):
+    from src.registry import ModelRegistry
+    pipe, metrics = train_on_df(dummy_df())
+    save_model(pipe, tmp_path / "hamburg" / "v1.joblib", {"metrics": metrics})
+    monkeypatch.setattr(app_mod, "loaded", None)
+    monkeypatch.setattr(app_mod, "models", ModelRegistry(tmp_path))
+    client = TestClient(app_mod.app)
+
+    r = client.get("/predict", params={**PARAMS, "city": "hamburg"})
+    assert np.isclose(r.json()["predicted_price"], pipe.predict(pd.DataFrame([PARAMS]))[0],
+                      atol=0.005)
+    assert client.get("/predict", params={**PARAMS, "city": "oslo"}).status_code == 404
+    listing = client.get("/models").json()
+    assert [(m["city"], m["version"]) for m in listing["loaded"]] == [("hamburg", "v1")]
+    assert listing["loaded_mb"] > 0
+
+
+def test_jobs_score_files_in_background(tmp_path, monkeypatch):
+    import time
+    from src.export_to_excel import score_file
+    from src.jobs import JobManager
+
+    df = dummy_df()
+    pipe, metrics = train_on_df(df)
+    model = tmp_path / "baseline.joblib"
+    save_model(pipe, model, {"metrics": metrics})
+    data = tmp_path / "data"
+    data.mkdir()
+    df.assign(id=np.arange(len(df))).to_csv(data / "listings.csv", index=False)
+    monkeypatch.setattr(app_mod, "MODEL_PATH", str(model))
+    monkeypatch.setattr(app_mod, "META_PATH", str(model) + ".meta.json")
+    monkeypatch.setattr(app_mod, "JOB_DATA_DIR", str(data))
+    monkeypatch.setattr(app_mod, "UPLOAD_WRITE_BYTES", 1024)   # upload written in pieces
+    monkeypatch.setattr(app_mod, "jobs", JobManager(tmp_path / "jobs", workers=1, chunksize=40))
+    client = TestClient(app_mod.app)
+
+    try:
+        by_path = client.post("/jobs", json={"path": "listings.csv"}).json()
+        upload = client.post("/jobs", content=(data / "listings.csv").read_bytes(),
+                             headers={"content-type": "text/csv"}).json()
+        assert client.post("/jobs", json={"path": "../baseline.joblib"}).status_code == 403
+        for job in (by_path, upload):
+            deadline = time.monotonic() + 60
+            while client.get(job["status_url"]).json()["state"] in ("queued", "running"):
+                assert time.monotonic() < deadline
+                time.sleep(0.1)
+            status = client.get(job["status_url"]).json()
+            assert status["state"] == "done" and status["rows"] == len(df), status
+            r = client.get(job["result_url"])
+            (tmp_path / "result.parquet").write_bytes(r.content)
+            result = pd.read_parquet(tmp_path / "result.parquet")
+            expected = pd.concat(score_file(data / "listings.csv", model,
+                                            str(model) + ".meta.json", chunksize=40))
+            np.testing.assert_allclose(result["predicted_price"], expected["predicted_price"])
+        assert len(client.get("/jobs").json()) == 2
+        assert client.get("/jobs/nope/result").status_code == 404
+    finally:
+        app_mod.jobs.shutdown()
+
+
+def test_price_index_fast_mode_and_fallback(monkeypatch):
+    from src.models.price_index import PriceIndex, build_index
+    df = dummy_df()
+    monkeypatch.setattr(app_mod, "price_index", PriceIndex(build_index(df)))
+    monkeypatch.setattr(app_mod, "loaded", None)
+    client = TestClient(app_mod.app)
+
+    fallback = client.get("/predict", params=PARAMS).json()
+    assert fallback == client.get("/predict", params={**PARAMS, "mode": "index"}).json()
+    assert fallback["sample_size"] >= 10 and fallback["p25"] <= fallback["estimated_price"]
+
+    csv = df[["neighbourhood", "room_type", "accommodates"]].head(5).to_csv(index=False)
+    r = client.post("/predict_batch?mode=index", content=csv,
+                    headers={"content-type": "text/csv"})
+    out = pd.read_csv(io.StringIO(r.text))
+    assert list(out.columns) == ["estimated_price", "sample_size"] and len(out) == 5
@@ -0,0 +1,48 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from src.batching import MicroBatcher
+from src.models.train import train_on_df
+from src.synthetic import dummy_df
+
+
+def _gather(batcher, rows):
+    async def run():
+        return await asyncio.gather(*(batcher.predict(r) for r in rows))
+    return asyncio.run(run())
+
+
+def test_batched_matches_unbatched():
+    df = dummy_df()
+    pipe, _ = train_on_df(df)
+    rows = df.drop(columns=["price"]).head(40).to_dict("records")
+    predict_many = lambda rs: pipe.predict(pd.DataFrame(rs))
+
+    batcher = MicroBatcher(predict_many, max_batch_size=16, max_wait_ms=5)
+    batched = _gather(batcher, rows)
+    unbatched = [predict_many([r])[0] for r in rows]
+    np.testing.assert_allclose(batched, unbatched)
+    assert batcher.n_rows == 40 and batcher.n_batches == 3   # 16 + 16 + 8
+
+
+def test_batch_error_reaches_every_caller():
+    def boom(rows):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(boom, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        _gather(batcher, [{}] * 3)
+
+
+def test_in_flight_batches_are_referenced_until_done():
+    async def run():
+        batcher = MicroBatcher(lambda rows: [1.0] * len(rows), max_batch_size=2, max_wait_ms=1)
+        pending = asyncio.gather(batcher.predict({}), batcher.predict({}))
+        await asyncio.sleep(0)
+        assert len(batcher._tasks) == 1
+        await pending
+        await asyncio.sleep(0)
+        return batcher._tasks
+
+    assert asyncio.run(run()) == set()
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from benchmarks.suite import compare, run
+from src.synthetic import synthetic_dump
+from src.clean import prepare_features
+
+
+def _report(**metrics):
+    return {"results": {"1000": metrics}}
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    base = _report(train_seconds=1.0, clean_rows_per_s=1000.0, model_size_mb=10.0)
+    cur = _report(train_seconds=1.5, clean_rows_per_s=700.0, model_size_mb=10.5)
+    out = compare(cur, base, threshold=0.2)
+    assert len(out) == 2
+    assert any("train_seconds" in r for r in out) and any("clean_rows_per_s" in r for r in out)
+    # faster / smaller is never a regression
+    assert compare(_report(train_seconds=0.1, clean_rows_per_s=5000.0), base, 0.0) == []
+
+
+def test_gate_fails_without_baseline(tmp_path, monkeypatch):
+    import pytest
+    from benchmarks import suite
+    monkeypatch.setattr("sys.argv", ["suite", "--gate", "--baseline", str(tmp_path / "none.json")])
+    monkeypatch.setattr(suite, "run", lambda *a, **k: pytest.fail("ran without a baseline"))
+    with pytest.raises(SystemExit) as exc:
+        suite.main()
+    assert exc.value.code not in (0, None)
+
+
+def test_synthetic_dump_cleans_to_all_rows():
+    assert len(prepare_features(synthetic_dump(300))) == 300
+
+
+def test_run_reports_every_metric():
+    report = run([200], latency_calls=5)
+    metrics = report["results"]["200"]
+    assert set(metrics) == {"clean_rows_per_s", "train_seconds", "model_size_mb",
+                            "predict_p50_ms", "predict_p99_ms", "batch_rows_per_s"}
+    assert all(v > 0 for v in metrics.values())
+
+
+def test_loadtest_against_the_app_in_process(monkeypatch):
+    import asyncio
+    import httpx
+    from benchmarks.loadtest import Payloads, load_samples, parse_mix, run_load
+    from src import app as app_mod
+
+    monkeypatch.setattr(app_mod, "loaded", None)   # demo predictions
+    monkeypatch.setattr(app_mod, "price_index", None)
+    assert parse_mix("predict=3,batch=1") == {"predict": 0.75, "batch": 0.25}
+    payloads = Payloads(load_samples(Path(__file__).parents[1] / "batch.json"), parse_mix("predict=1,batch=1"), batch_size=3)
+
+    async def drive(**load):
+        transport = httpx.ASGITransport(app=app_mod.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await run_load(client, payloads, duration=0.3, **load)
+
+    closed = asyncio.run(drive(concurrency=4))
+    assert set(closed["endpoints"]) == {"predict", "batch"}
+    assert closed["overall"]["requests"] > 0 and closed["overall"]["error_rate"] == 0
+    o = closed["overall"]
+    assert 0 < o["p50_ms"] <= o["p95_ms"] <= o["p99_ms"] <= o["max_ms"]
+
+    opened = asyncio.run(drive(rate=50))
+    assert 5 <= opened["overall"]["requests"] <= 20 and opened["statuses"].keys() == {"200"}
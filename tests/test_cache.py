@@ -0,0 +1,55 @@
+import numpy as np
+from src.cache import PredictionCache, model_version
+
+ROW = {"room_type": "Private room", "neighbourhood": "Mitte", "accommodates": 1,
+       "bedrooms": 1.0, "reviews_per_month": 0.30000001}
+
+
+def test_key_is_canonical():
+    cache = PredictionCache(decimals=6)
+    other = {**ROW, "accommodates": np.float64(1.0), "reviews_per_month": 0.3}
+    assert cache.key(ROW) == cache.key(dict(reversed(list(other.items()))))
+    assert cache.key(ROW) != cache.key({**ROW, "neighbourhood": "Pankow"})
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(max_size=2)
+    rows = [{**ROW, "accommodates": i} for i in range(3)]
+    for i, r in enumerate(rows):
+        cache.put(r, "v1", float(i))
+    assert cache.get(rows[0], "v1") is None          # evicted (least recently used)
+    assert cache.get(rows[2], "v1") == 2.0
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["evictions"], s["size"]) == (1, 1, 1, 2)
+
+
+def test_new_model_version_invalidates():
+    cache = PredictionCache()
+    v1 = model_version({"created": "2025-01-01T00:00:00"})
+    cache.put(ROW, v1, 99.0)
+    assert cache.get(ROW, v1) == 99.0
+    v2 = model_version({"metrics": {"mae": 40.0}})
+    assert v2 and v2 != v1
+    assert cache.get(ROW, v2) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    import src.cache as cache_mod
+    now = [100.0]
+    monkeypatch.setattr(cache_mod, "monotonic", lambda: now[0])
+    cache = PredictionCache(ttl_s=10)
+    cache.put(ROW, "v1", 1.0)
+    now[0] += 11
+    assert cache.get(ROW, "v1") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_version_without_meta_follows_the_model_file(tmp_path):
+    import os
+    f = tmp_path / "model.joblib"
+    f.write_bytes(b"v1")
+    v1 = model_version({}, f)
+    os.utime(f, ns=(1, 1))
+    assert v1 is not None and model_version({}, f) != v1
+    assert model_version({}, tmp_path / "missing.joblib") is None
@@ -1,5 +1,9 @@
 import pandas as pd
-from src.clean import to_euro, simple_bath, prepare_features
+import pytest
+from src.clean import (to_euro, simple_bath, prepare_features,
+                       to_euro_series, simple_bath_series,
+                       raw_columns, iter_clean_chunks, write_chunks, main,
+                       clean_many, find_inputs)
 
 def test_to_euro():
     assert to_euro("€1.234,56") == 1234.56
@@ -28,4 +32,128 @@ def test_prepare_features_minimal():
     out = prepare_features(df)
     assert {"price","room_type","neighbourhood","accommodates","bedrooms","bathrooms_num",
             "minimum_nights","number_of_reviews","reviews_per_month","availability_365"}.issubset(out.columns)
-    assert len(out) == 3
\ No newline at end of file
+    assert len(out) == 3
+
+PRICES = ["€1.234,56", "1,234", "1.234", "999", "$1,234.00", "\xa080.5", "€ 80",
+          None, float("nan"), "", "n/a", "1e3", "12.", "€.5", "1.23", 1.234, 100]
+BATHS = ["1.5 baths", "half bath", "1,5", "Half-bath", "Shared half-bath", "0 baths",
+         "baths", ".5", "1.5.", "bath 1.5", "2² baths", None, float("nan"), 3.0]
+
+
+def test_to_euro_series_matches_scalar():
+    s = pd.Series(PRICES * 3, dtype=object)
+    expected = s.map(to_euro).astype(float)
+    pd.testing.assert_series_equal(to_euro_series(s), expected)
+
+
+def test_simple_bath_series_matches_scalar():
+    s = pd.Series(BATHS * 3, dtype=object)
+    expected = s.map(simple_bath).astype(float)
+    pd.testing.assert_series_equal(simple_bath_series(s), expected)
+
+
+def _raw_dump(path, n=50):
+    rows = []
+    for i in range(n):
+        rows.append({
+            "id": i, "description": "x" * 200, "amenities": '["Wifi", "Kitchen"]',
+            "price": f"${40 + i:,}.00", "room_type": ["Entire home/apt", "Private room"][i % 2],
+            "neighbourhood": "Berlin, Germany", "neighbourhood_cleansed": ["Mitte", "Pankow"][i % 2],
+            "accommodates": None if i == 7 else 1 + i % 4, "bedrooms": 1,
+            "bathrooms_text": ["1 bath", "half bath", None][i % 3],
+            "minimum_nights": 2, "number_of_reviews": i, "reviews_per_month": 0.1 * i,
+            "availability_365": 300 - i,
+        })
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_raw_columns_prunes_unused():
+    cols = raw_columns(["id", "description", "price", "neighbourhood", "neighbourhood_cleansed",
+                        "bathrooms_text", "room_type", "accommodates"])
+    assert cols == ["id", "price", "neighbourhood_cleansed", "bathrooms_text", "room_type",
+                    "accommodates"]
+
+
+def test_streaming_matches_in_memory(tmp_path, monkeypatch):
+    raw = tmp_path / "listings.csv"
+    _raw_dump(raw)
+    full, streamed = tmp_path / "full.csv", tmp_path / "streamed.csv"
+    monkeypatch.setattr("sys.argv", ["clean", "--in", str(raw), "--out", str(full)])
+    main()
+    monkeypatch.setattr("sys.argv", ["clean", "--in", str(raw), "--out", str(streamed),
+                                     "--chunksize", "7"])
+    main()
+    assert full.read_bytes() == streamed.read_bytes()
+
+    pytest.importorskip("pyarrow")
+    n = write_chunks(iter_clean_chunks(raw, 7), tmp_path / "streamed.parquet")
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "streamed.parquet"),
+                                  pd.read_csv(full))
+    assert n == len(pd.read_csv(full))
+
+
+def test_many_snapshots_keep_latest_per_listing(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    for city, date, n in [("berlin", "2024-01-15", 30), ("berlin", "2024-02-15", 40),
+                          ("paris", "2024-02-10", 20)]:
+        (tmp_path / city / date).mkdir(parents=True)
+        _raw_dump(tmp_path / city / date / "listings.csv", n)
+    # a later price for the listings both Berlin snapshots share
+    feb = tmp_path / "berlin" / "2024-02-15" / "listings.csv"
+    pd.read_csv(feb).assign(price="€999").to_csv(feb, index=False)
+
+    out = tmp_path / "all.parquet"
+    monkeypatch.setattr("sys.argv", ["clean", "--in", str(tmp_path / "*" / "*" / "listings.csv"),
+                                     "--out", str(out), "--workers", "2", "--chunksize", "7"])
+    main()
+    df = pd.read_parquet(out)
+    assert not df.duplicated(["city", "id"]).any()
+    berlin, paris = df[df["city"] == "berlin"], df[df["city"] == "paris"]
+    assert set(berlin["snapshot"]) == {"2024-02-15"} and (berlin["price"] == 999).all()
+    # rows without bathrooms (i % 3 == 2) or accommodates (id 7) do not survive cleaning
+    assert len(berlin) == 26 and len(paris) == 13
+
+    manifest = tmp_path / "manifest.csv"
+    pd.DataFrame({"path": ["berlin/2024-01-15/listings.csv"], "city": ["Berlin"],
+                  "snapshot": ["2024-01"]}).to_csv(manifest, index=False)
+    stats = clean_many(find_inputs([], manifest), tmp_path / "one.csv")
+    assert stats["files"] == 1 and stats["rows_out"] == 19
+    assert set(pd.read_csv(tmp_path / "one.csv")["snapshot"]) == {"2024-01"}
+
+
+def test_prepare_is_compact_and_does_not_copy_wide_input():
+    import tracemalloc
+    import numpy as np
+    n = 20_000
+    rng = np.random.default_rng(0)
+    prices = rng.integers(20, 400, n)
+    raw = pd.DataFrame({
+        "id": np.arange(n), "price": [f"€{p}" for p in prices],
+        "room_type": rng.choice(["Entire home/apt", "Private room"], n),
+        "neighbourhood_cleansed": rng.choice(["Mitte", "Pankow", "Neukölln"], n),
+        "accommodates": rng.integers(1, 8, n).astype(float), "bedrooms": rng.integers(0, 4, n),
+        "bathrooms_text": rng.choice(["1 bath", "1.5 baths", "half bath"], n),
+        "minimum_nights": rng.integers(1, 30, n), "number_of_reviews": rng.integers(0, 900, n),
+        "reviews_per_month": rng.random(n).round(2), "availability_365": rng.integers(0, 366, n),
+        **{f"unused{i}": rng.random(n) for i in range(120)},   # a wide dump
+    })
+    raw.loc[3, "accommodates"] = np.nan
+    kept_max = int(raw["number_of_reviews"].drop(index=3).max())
+
+    tracemalloc.start()
+    out = prepare_features(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 0.5 * raw.memory_usage(deep=False).sum()   # a full copy would be >= 1x
+
+    assert len(out) == n - 1 and 3 not in out.index
+    assert out["accommodates"].dtype == np.int32 and out["availability_365"].dtype == np.int32
+    assert (out["number_of_reviews"] * 1000).max() == kept_max * 1000    # no int16 wrap-around
+    assert out["bathrooms_num"].dtype == np.float32                 # 0.5/1/1.5 are exact
+    assert out["reviews_per_month"].dtype == np.float64             # 0.3 is not
+    assert out["neighbourhood"].dtype == "category"
+    kept = raw.drop(index=3)
+    for c in ["accommodates", "bedrooms", "minimum_nights", "number_of_reviews",
+              "reviews_per_month", "availability_365"]:
+        np.testing.assert_array_equal(out[c].astype(float), kept[c].astype(float))
+    np.testing.assert_array_equal(out["price"], np.delete(prices, 3))
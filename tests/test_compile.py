@@ -0,0 +1,46 @@
+import numpy as np
+from pathlib import Path
+from src.models.train import train_on_df
+from src.models.compile import compile_pipeline, save_compiled, load_compiled
+from src.synthetic import dummy_df
+
+
+def test_compiled_matches_pipeline(tmp_path: Path):
+    df = dummy_df()
+    pipe, _ = train_on_df(df)
+    X = df.drop(columns=["price"])
+    X.loc[0, "bedrooms"] = np.nan
+    X.loc[1, "neighbourhood"] = "Unknown"
+    forest = compile_pipeline(pipe)
+    np.testing.assert_allclose(forest.predict(X), pipe.predict(X), rtol=1e-9)
+
+    loaded = load_compiled(save_compiled(forest, tmp_path / "m.compiled"), mmap_mode="r")
+    record = X.iloc[1].to_dict()
+    assert np.isclose(loaded.predict_one(record), pipe.predict(X.iloc[[1]])[0])
+
+
+def test_shrunk_dtypes_keep_predictions(tmp_path: Path):
+    from src.models.compile import shrink_dtypes
+    df = dummy_df()
+    pipe, _ = train_on_df(df)
+    X = df.drop(columns=["price"])
+    small = shrink_dtypes(compile_pipeline(pipe))
+    assert small.feature.dtype == np.uint8 and small.threshold.dtype == np.float32
+    np.testing.assert_allclose(small.predict(X), pipe.predict(X), rtol=1e-6)
+
+    packed = load_compiled(save_compiled(small, tmp_path / "m.compiled", compress=True))
+    assert (tmp_path / "m.compiled" / "nodes.npz").exists()
+    np.testing.assert_array_equal(packed.predict(X), small.predict(X))
+
+
+def test_pruning_caps_trees_depth_and_leaf_size():
+    df = dummy_df()
+    pipe, _ = train_on_df(df)
+    full = compile_pipeline(pipe)
+    pruned = compile_pipeline(pipe, max_trees=10, max_depth=3, min_leaf_samples=5)
+    assert pruned.n_trees == 10 and pruned.max_depth <= 3
+    assert len(pruned.value) < len(full.value)
+    # depth 0 keeps only each tree's root: the mean of its bootstrap sample
+    stumps = compile_pipeline(pipe, max_depth=0)
+    roots = np.array([t.tree_.value[0, 0, 0] for t in pipe[-1].estimators_])
+    np.testing.assert_allclose(stumps.predict(df.head(3)), roots.mean())
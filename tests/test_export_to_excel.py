@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from src.export_to_excel import _basic_clean, main, score_file
+from src.models.train import FEATURES, save_model, train_on_df
+from src.synthetic import dummy_df
+
+
+def test_parallel_scoring_matches_single_process(tmp_path, monkeypatch):
+    df = dummy_df()
+    pipe, metrics = train_on_df(df)
+    model = tmp_path / "baseline.joblib"
+    save_model(pipe, model, {"metrics": metrics})
+
+    raw = df.assign(id=np.arange(len(df)), price=[f"${p:,.2f}" for p in df["price"]],
+                    description="long text that is never read")
+    raw.to_csv(tmp_path / "listings.csv", index=False)
+    meta = str(model) + ".meta.json"
+
+    single = pd.concat(score_file(tmp_path / "listings.csv", model, meta, chunksize=40))
+    multi = pd.concat(score_file(tmp_path / "listings.csv", model, meta, chunksize=40, workers=2))
+    pd.testing.assert_frame_equal(single, multi)
+    compiled = pd.concat(score_file(tmp_path / "listings.csv", model, meta, chunksize=40,
+                                    workers=2, engine="compiled"))
+    np.testing.assert_allclose(compiled["predicted_price"], single["predicted_price"])
+    expected = pipe.predict(_basic_clean(raw.copy())[FEATURES])
+    np.testing.assert_allclose(single["predicted_price"], expected)
+
+    monkeypatch.setattr("sys.argv", [
+        "export", "--in", str(tmp_path / "listings.csv"), "--model", str(model), "--meta", meta,
+        "--out", str(tmp_path / "pred.csv"), "--excel", str(tmp_path / "sample.xlsx"),
+        "--excel-rows", "25", "--chunksize", "40", "--workers", "1"])
+    main()
+    assert len(pd.read_csv(tmp_path / "pred.csv")) == len(df)
+    assert len(pd.read_excel(tmp_path / "sample.xlsx")) == 25
+
+
+def test_compare_workers_reports_both_runs(tmp_path, monkeypatch, capsys):
+    df = dummy_df()
+    pipe, metrics = train_on_df(df)
+    model = tmp_path / "baseline.joblib"
+    save_model(pipe, model, {"metrics": metrics})
+    df.assign(id=np.arange(len(df))).to_csv(tmp_path / "listings.csv", index=False)
+
+    monkeypatch.setattr("sys.argv", [
+        "export", "--in", str(tmp_path / "listings.csv"), "--model", str(model),
+        "--meta", str(model) + ".meta.json", "--out", str(tmp_path / "pred.parquet"),
+        "--chunksize", "40", "--workers", "2", "--compare-workers"])
+    main()
+    out = capsys.readouterr().out
+    assert "1 worker(s)" in out and "2 worker(s)" in out and "speedup" in out
+    assert len(pd.read_parquet(tmp_path / "pred.parquet")) == len(df)
@@ -0,0 +1,81 @@
+import joblib
+import numpy as np
+import pandas as pd
+from src.synthetic import synthetic_dump
+from src.clean import ID, _output_frame, _prepare
+from src.incremental import HASH, read_snapshot, retrain, update_store
+from src.models.train import FEATURES
+
+
+def _snapshot(tmp_path, df, name):
+    path = tmp_path / name
+    df.to_csv(path, index=False)
+    return read_snapshot(path)
+
+
+def test_update_store_cleans_only_changed_rows(tmp_path):
+    first = synthetic_dump(300)
+    store, stats = update_store(_snapshot(tmp_path, first, "s1.csv"), None)
+    assert stats["reprocessed"] == 300 and stats["changed_share"] == 1.0
+
+    second = first.iloc[5:].copy()                              # 5 delisted
+    second.loc[second.index[:10], "price"] = "$999.00"         # 10 updated
+    extra = synthetic_dump(5, seed=1).assign(id=range(1000, 1005))
+    second = pd.concat([second, extra])                         # 5 new
+    raw2 = _snapshot(tmp_path, second, "s2.csv")
+    store2, stats = update_store(raw2, store)
+    assert (stats["new"], stats["updated"], stats["removed"]) == (5, 10, 5)
+    assert stats["reprocessed"] == 15 and stats["unchanged"] == 285
+
+    # the merged store equals a full clean of the new snapshot
+    full = _output_frame(_prepare(raw2)).sort_values(ID).reset_index(drop=True)
+    merged = store2.drop(columns=HASH).dropna().sort_values(ID).reset_index(drop=True)
+    pd.testing.assert_frame_equal(merged[full.columns], full)
+
+
+def _shifted(store, share=0.1):
+    """The store with `share` of its rows moved to larger listings."""
+    store = store.copy()
+    rows = store.index[: int(len(store) * share)]
+    store.loc[rows, "accommodates"] += 10
+    store.loc[rows, "price"] += 100
+    return store
+
+
+def test_retrain_warm_starts_existing_model(tmp_path):
+    store, _ = update_store(_snapshot(tmp_path, synthetic_dump(300), "s1.csv"), None)
+    model = tmp_path / "model.joblib"
+    pipe, metrics, info = retrain(store, model)
+    assert info["mode"] == "full" and metrics["n_valid"] > 0
+    joblib.dump(pipe, model)
+
+    changed = _shifted(store)
+    pipe2, _, info2 = retrain(changed, model, add_trees=20, max_trees=1000)
+    assert info2["mode"] == "warm_start" and info2["size"] == info["size"] + 20
+    # the old trees are kept as they were, on the preprocessor they were fit with
+    X = pipe.named_steps["prep"].transform(changed[FEATURES])
+    old, grown = pipe.named_steps["model"], pipe2.named_steps["model"]
+    for before, after in zip(old.estimators_, grown.estimators_[:info["size"]]):
+        np.testing.assert_array_equal(before.predict(X), after.predict(X))
+
+    _, _, info3 = retrain(store, model, add_trees=20, max_trees=info["size"])
+    assert info3["mode"] == "full"
+
+
+def test_retrain_rebuilds_hgb_on_changed_data(tmp_path):
+    store, _ = update_store(_snapshot(tmp_path, synthetic_dump(300), "s1.csv"), None)
+    model = tmp_path / "model.joblib"
+    pipe, _, _ = retrain(store, model, engine="hgb")
+    joblib.dump(pipe, model)
+
+    changed = _shifted(store)
+    pipe2, _, info = retrain(changed, model, engine="hgb", add_trees=20, max_trees=1000)
+    assert info["mode"] == "full" and info["added"] == info["size"]
+
+    # every tree was fit on the bins of the changed data: same as a fresh fit
+    fresh, _, _ = retrain(changed, tmp_path / "none.joblib", engine="hgb")
+    for got, want in zip(pipe2.named_steps["model"]._bin_mapper.bin_thresholds_,
+                         fresh.named_steps["model"]._bin_mapper.bin_thresholds_):
+        np.testing.assert_array_equal(got, want)
+    np.testing.assert_allclose(pipe2.predict(changed[FEATURES]),
+                               fresh.predict(changed[FEATURES]))
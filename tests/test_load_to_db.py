@@ -0,0 +1,40 @@
+import sqlite3
+import pandas as pd
+import pytest
+from src.load_to_db import bulk_load
+
+
+def _snapshot(prices):
+    return pd.DataFrame({
+        "id": [101, 102, 103][: len(prices)],
+        "room_type": ["Private room", "Entire home/apt", "Shared room"][: len(prices)],
+        "neighbourhood": ["Mitte", "Pankow", "Wedding"][: len(prices)],
+        "accommodates": [1.0, 4.0, 2.0][: len(prices)],
+        "reviews_per_month": [0.2, None, 1.5][: len(prices)],
+        "price": prices,
+    })
+
+
+def test_sqlite_upsert_touches_only_changed_rows(tmp_path):
+    conn = sqlite3.connect(tmp_path / "airbnb.db")
+    first = _snapshot([50.0, 120.0])
+    stats = bulk_load([first.iloc[:1], first.iloc[1:]], conn, "sqlite")
+    assert (stats["inserted"], stats["updated"], stats["unchanged"]) == (2, 0, 0)
+
+    stats = bulk_load([_snapshot([50.0, 130.0, 30.0])], conn, "sqlite")
+    assert (stats["inserted"], stats["updated"], stats["unchanged"]) == (1, 1, 1)
+    assert stats["total_rows_per_s"] > 0
+
+    stats = bulk_load([_snapshot([50.0, 130.0])], conn, "sqlite", prune=True)
+    assert (stats["inserted"], stats["updated"], stats["deleted"]) == (0, 0, 1)
+    out = pd.read_sql("SELECT id, price FROM listings ORDER BY id", conn)
+    assert out.to_dict("list") == {"id": [101, 102], "price": [50.0, 130.0]}
+
+
+def test_table_without_id_asks_for_replace(tmp_path):
+    conn = sqlite3.connect(tmp_path / "airbnb.db")
+    _snapshot([50.0]).drop(columns=["id"]).to_sql("listings", conn, index=False)
+    with pytest.raises(ValueError, match="--replace"):
+        bulk_load([_snapshot([50.0, 120.0])], conn, "sqlite")
+    stats = bulk_load([_snapshot([50.0, 120.0])], conn, "sqlite", replace=True)
+    assert stats["inserted"] == 2
@@ -0,0 +1,37 @@
+from src.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("lat_seconds", "latency", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 5.0):
+        h.observe("model", value=v)
+    lines = h.render()
+    assert 'lat_seconds_bucket{stage="model",le="0.1"} 1' in lines
+    assert 'lat_seconds_bucket{stage="model",le="1"} 3' in lines
+    assert 'lat_seconds_bucket{stage="model",le="+Inf"} 4' in lines
+    assert 'lat_seconds_count{stage="model"} 4' in lines
+    assert 'lat_seconds_sum{stage="model"} 6.05' in lines
+
+
+def test_registry_text_format_and_gauge_replace():
+    reg = Registry()
+    c = reg.add(Counter("requests_total", "requests", ("endpoint", "status")))
+    g = reg.add(Gauge("model_info", "model", ("version",)))
+    c.inc("/predict", "200")
+    c.inc("/predict", "200")
+    g.replace("v1")
+    g.replace('v"2')
+    text = reg.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="/predict",status="200"} 2' in text
+    assert 'model_info{version="v\\"2"} 1' in text and "v1" not in text
+
+
+def test_large_counters_render_exactly():
+    c = Counter("requests_total", "requests")
+    c.inc(amount=1_234_566)
+    c.inc()
+    h = Histogram("rows", "rows")
+    h.observe(value=1_234_567.25)
+    assert c.render()[-1] == "requests_total 1234567"
+    assert "rows_sum 1234567.25" in h.render()
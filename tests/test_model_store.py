@@ -0,0 +1,97 @@
+import os
+import numpy as np
+import pandas as pd
+from src.model_store import LoadedModel, ModelWatcher, load_model
+from src.models.train import FEATURES, train_on_df, save_model
+from src.synthetic import dummy_df
+
+
+def test_load_model_compiles_once_and_memory_maps(tmp_path):
+    df = dummy_df()
+    pipe, metrics = train_on_df(df)
+    out = tmp_path / "baseline.joblib"
+    save_model(pipe, out, {"metrics": metrics})
+
+    first = load_model(out)
+    assert first.kind == "compiled" and first.version is not None
+    assert (tmp_path / "baseline.joblib.compiled" / "spec.json").is_file()
+
+    second = load_model(out)
+    assert second.model is None                        # no joblib.load needed
+    assert isinstance(second.engine.value, np.memmap)  # shared between workers via page cache
+    rows = df.drop(columns=["price"]).head(5).to_dict("records")
+    np.testing.assert_allclose(second.warm_up().predict_rows(rows),
+                               pipe.predict(pd.DataFrame(rows)))
+
+
+def test_load_model_falls_back_when_compiled_dir_is_unreadable(tmp_path):
+    df = dummy_df()
+    pipe, metrics = train_on_df(df)
+    out = tmp_path / "baseline.joblib"
+    save_model(pipe, out, {"metrics": metrics})
+    compiled = tmp_path / "baseline.joblib.compiled"
+    load_model(out)
+    for npy in compiled.glob("*.npy"):     # e.g. mid-replace by another worker
+        npy.unlink()
+
+    loaded = load_model(out)
+    assert loaded.kind == "compiled" and loaded.model is None   # recompiled and mapped
+    assert any(compiled.glob("*.npy"))
+    rows = df.drop(columns=["price"]).head(5).to_dict("records")
+    np.testing.assert_allclose(loaded.predict_rows(rows), pipe.predict(pd.DataFrame(rows)))
+
+
+def test_watcher_waits_for_change_to_settle(tmp_path):
+    f = tmp_path / "model.joblib"
+    f.write_bytes(b"v1")
+    calls = []
+    watcher = ModelWatcher([f], lambda: calls.append(1), interval_s=60)
+    assert not watcher.poll()
+    f.write_bytes(b"v2-longer")
+    os.utime(f, ns=(1, 1))
+    assert not watcher.poll()        # first sighting of the change
+    assert watcher.poll()            # unchanged for one interval -> reload
+    assert calls == [1] and not watcher.poll()
+
+
+def test_watcher_thread_stops_and_joins(tmp_path):
+    f = tmp_path / "model.joblib"
+    f.write_bytes(b"v1")
+    watcher = ModelWatcher([f], lambda: None, interval_s=0.01)
+    watcher.start()
+    watcher.stop()
+    watcher.join(timeout=5)
+    assert not watcher.is_alive()
+
+
+def test_watcher_ignores_files_written_by_the_reload(tmp_path):
+    f, spec = tmp_path / "model.joblib", tmp_path / "spec.json"
+    f.write_bytes(b"v1")
+    calls = []
+
+    def reload():
+        calls.append(1)
+        spec.write_text("compiled by this reload")
+
+    watcher = ModelWatcher([f, spec], reload, interval_s=60)
+    f.write_bytes(b"v2-longer")
+    assert not watcher.poll() and watcher.poll()
+    assert not watcher.poll() and not watcher.poll()
+    assert calls == [1]
+
+
+def test_row_encoder_is_bit_identical_to_pipeline():
+    df = dummy_df()
+    rows = df[FEATURES].head(20).to_dict("records")
+    rows[0]["bedrooms"] = None
+    rows[1]["reviews_per_month"] = float("nan")
+    rows[2]["neighbourhood"] = "Atlantis"
+    rows[3]["room_type"] = None
+    for engine in ("rf", "hgb"):
+        pipe, _ = train_on_df(df, engine)
+        loaded = LoadedModel("m", {"features": FEATURES}, model=pipe)
+        assert loaded.encoder is not None
+        np.testing.assert_array_equal(loaded.predict_rows(rows), pipe.predict(pd.DataFrame(rows)))
+
+    # inputs that do not match the meta's features fall back to the DataFrame path
+    assert LoadedModel("m", {"features": ["x"]}, model=pipe).encoder is None
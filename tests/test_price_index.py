@@ -0,0 +1,33 @@
+import pandas as pd
+from src.models.price_index import PriceIndex, accommodates_bucket, build_index, save_index
+from src.synthetic import dummy_df
+
+
+def test_lookup_backs_off_to_coarser_cells(tmp_path):
+    df = pd.DataFrame({
+        "neighbourhood": ["Mitte"] * 12 + ["Pankow"] * 3 + ["Mitte"] * 5,
+        "room_type": ["Private room"] * 15 + ["Shared room"] * 5,
+        "accommodates": [2] * 12 + [2] * 3 + [1] * 5,
+        "price": [50.0] * 6 + [70.0] * 6 + [40.0] * 3 + [20.0] * 5,
+    })
+    index = PriceIndex.load(save_index(build_index(df, min_count=5), tmp_path / "i.json"))
+
+    full = index.lookup({"neighbourhood": "Mitte", "room_type": "Private room", "accommodates": 2})
+    assert full == {"price": 60.0, "p25": 50.0, "p75": 70.0, "sample_size": 12,
+                    "level": "neighbourhood+room_type+accommodates"}
+    # 3 Pankow listings are too few -> room type + size over both neighbourhoods
+    sparse = index.lookup({"neighbourhood": "Pankow", "room_type": "Private room",
+                           "accommodates": 2.0})
+    assert (sparse["level"], sparse["sample_size"]) == ("room_type+accommodates", 15)
+    unknown = index.lookup({"neighbourhood": "Atlantis", "room_type": "Boat", "accommodates": None})
+    assert (unknown["level"], unknown["sample_size"]) == ("all", 20)
+
+
+def test_buckets_and_frame_lookup():
+    assert [accommodates_bucket(v) for v in (1, 2, 3, 4.0, 6, 16, None)] == \
+        ["1", "2", "3-4", "3-4", "5-6", "7+", None]
+    df = dummy_df()
+    index = PriceIndex(build_index(df))
+    est = index.lookup_frame(df.head(20))
+    assert len(est) == 20 and (est["sample_size"] >= 10).all()
+    assert est["price"].between(df["price"].min(), df["price"].max()).all()
@@ -0,0 +1,32 @@
+import json
+import pstats
+from src import profiling
+from src.clean import main
+from tests.test_clean import _raw_dump
+
+
+def test_profile_off_is_a_no_op():
+    chunks = [1, 2, 3]
+    assert profiling.iterate("load", chunks) is chunks
+    with profiling.stage("load"):
+        pass
+    assert profiling.finish() is None
+
+
+def test_profile_report_per_stage(tmp_path, monkeypatch):
+    raw = tmp_path / "listings.csv"
+    _raw_dump(raw, n=200)
+    monkeypatch.setattr("sys.argv", ["clean", "--in", str(raw), "--out", str(tmp_path / "c.csv"),
+                                     "--chunksize", "50", "--profile", str(tmp_path / "rep")])
+    main()
+    (report_path,) = (tmp_path / "rep").glob("profile_clean_*.json")
+    report = json.loads(report_path.read_text())
+    assert set(report["stages"]) == {"load", "clean", "write"}
+    assert report["stages"]["load"]["calls"] == 5            # 4 chunks + end of file
+    for s in report["stages"].values():
+        assert s["seconds"] > 0 and s["tracemalloc_peak_mb"] > 0
+    staged = sum(s["seconds"] for s in report["stages"].values())
+    assert staged <= report["wall_seconds"]
+    assert any("_prepare" in f["function"] for f in report["top_functions"])
+    assert pstats.Stats(report["cprofile"]).total_calls > 0
+    assert profiling._active is None
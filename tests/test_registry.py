@@ -0,0 +1,102 @@
+import json
+import pytest
+from src.registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, path, nbytes):
+        self.path, self.nbytes = str(path), nbytes
+        self.kind, self.load_seconds = "sklearn", 0.0
+
+    def warm_up(self):
+        return self
+
+
+def _artifact(path, meta=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x")
+    if meta is not None:
+        path.with_name(path.name + ".meta.json").write_text(json.dumps(meta))
+
+
+def test_discovers_city_and_version(tmp_path):
+    _artifact(tmp_path / "baseline.joblib", {"created": "2025-01-01T00:00:00"})
+    _artifact(tmp_path / "paris" / "v1.joblib", {"created": "2025-01-01T00:00:00"})
+    _artifact(tmp_path / "paris" / "v2.joblib", {"created": "2025-02-01T00:00:00"})
+    _artifact(tmp_path / "rome.joblib", {"city": "Rome", "version": "2025-03"})
+    _artifact(tmp_path / ".prep_cache" / "x.joblib")
+    reg = ModelRegistry(tmp_path, load=lambda p, m: FakeModel(p, 1), rescan_s=0)
+
+    assert sorted(reg.artifacts) == [("berlin", "baseline"), ("paris", "v1"),
+                                     ("paris", "v2"), ("rome", "2025-03")]
+    assert reg.resolve("Paris").version == "v2"              # newest by meta["created"]
+    assert reg.resolve(None).model_path.name == "baseline.joblib"
+    with pytest.raises(KeyError):
+        reg.resolve("paris", "v3")
+
+    _artifact(tmp_path / "paris" / "v3.joblib")              # picked up on the next miss
+    assert reg.resolve("paris", "v3").version == "v3"
+
+
+def test_misses_rescan_at_most_once_per_interval(tmp_path, monkeypatch):
+    import src.registry as registry_mod
+    now = [100.0]
+    monkeypatch.setattr(registry_mod, "monotonic", lambda: now[0])
+    reg = ModelRegistry(tmp_path, rescan_s=30)
+    scans = []
+    monkeypatch.setattr(reg, "scan", lambda: scans.append(now[0]) or reg.artifacts)
+    for _ in range(3):
+        with pytest.raises(KeyError):
+            reg.resolve("atlantis")
+    assert scans == []                 # scanned at construction, interval not over yet
+    now[0] += 30
+    with pytest.raises(KeyError):
+        reg.resolve("atlantis")
+    assert scans == [130.0]
+
+
+def test_default_city_serves_the_shared_model(tmp_path):
+    _artifact(tmp_path / "baseline.joblib")
+    loads = []
+    reg = ModelRegistry(tmp_path, load=lambda p, m: loads.append(p) or FakeModel(p, 1))
+    default = FakeModel(tmp_path / "baseline.joblib", 1)
+    reg.share(default)
+    assert reg.get("berlin") is default and loads == []
+    assert reg.status()["available"][0]["loaded"]
+
+
+def test_lru_evicts_cold_models_over_budget(tmp_path):
+    for city in ("a", "b", "c"):
+        _artifact(tmp_path / city / "m.joblib")
+    mb = 2**20
+    loads = []
+
+    def load(path, meta_path):
+        loads.append(path.parent.name)
+        return FakeModel(path, 40 * mb)
+
+    reg = ModelRegistry(tmp_path, budget_mb=100, load=load)
+    reg.get("a"), reg.get("b"), reg.get("a")   # "b" is now the least recently used
+    reg.get("c")
+    status = reg.status()
+    assert [m["city"] for m in status["loaded"]] == ["c", "a"]
+    assert status["evictions"] == 1 and status["loaded_mb"] == 80
+    reg.get("a")
+    reg.get("b")                               # cold again -> reloaded
+    assert loads == ["a", "b", "c", "b"]
+
+
+def test_registry_serves_real_models(tmp_path):
+    import numpy as np
+    import pandas as pd
+    from src.models.train import save_model, train_on_df
+    from src.synthetic import dummy_df
+
+    df = dummy_df()
+    pipe, metrics = train_on_df(df, "hgb")
+    save_model(pipe, tmp_path / "lisbon" / "v1.joblib", {"metrics": metrics})
+    reg = ModelRegistry(tmp_path)
+    model = reg.get("lisbon")
+    rows = df.drop(columns=["price"]).head(3).to_dict("records")
+    np.testing.assert_array_equal(model.predict_rows(rows), pipe.predict(pd.DataFrame(rows)))
+    assert reg.status()["loaded"][0]["memory_mb"] > 0
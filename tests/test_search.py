@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from src.models.search import data_fingerprint, preprocess_cached, search
+from src.models.train import save_model
+from src.synthetic import dummy_df
+
+SMALL = {"n_estimators": [10, 20], "max_depth": [None, 5]}
+
+
+def test_fingerprint_tracks_data():
+    df = dummy_df()
+    assert data_fingerprint(df) == data_fingerprint(df.copy())
+    changed = df.copy()
+    changed.loc[0, "price"] += 1
+    assert data_fingerprint(changed) != data_fingerprint(df)
+
+
+def test_preprocess_cache_hit_matches_miss(tmp_path):
+    df = dummy_df()
+    _, X1, y1, hit1 = preprocess_cached(df, tmp_path)
+    _, X2, y2, hit2 = preprocess_cached(df, tmp_path)
+    assert (hit1, hit2) == (False, True)
+    assert (X1 == X2).all() and (y1 == y2).all()
+
+
+def test_search_grid_refits_best(tmp_path):
+    df = dummy_df()
+    pipe, metrics, trials, info = search(df, "grid", cv=3, n_jobs=1, cache_dir=tmp_path,
+                                         space=SMALL)
+    assert info["trials_run"] == len(trials) == 4 and not info["stopped_by_budget"]
+    assert trials["mae"].is_monotonic_increasing
+    assert metrics["mae"] == pytest.approx(trials.loc[0, "mae"])
+    assert pipe.predict(df.head(3)).shape == (3,)
+
+    out = tmp_path / "model.joblib"
+    save_model(pipe, out, {"metrics": metrics, "search": info})
+    meta = json.loads((tmp_path / "model.joblib.meta.json").read_text())
+    assert meta["search"]["best_params"] == info["best_params"]
+
+
+def test_search_stops_at_budget(tmp_path):
+    _, _, trials, info = search(dummy_df(), "grid", cv=2, budget_s=0.0, n_jobs=1,
+                                cache_dir=tmp_path, space=SMALL)
+    assert len(trials) == info["trials_run"] == 1
+    assert info["stopped_by_budget"]
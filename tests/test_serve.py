@@ -0,0 +1,42 @@
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+from benchmarks.loadtest import _free_port, wait_until
+from src.models.train import save_model, train_on_df
+from tests.test_app import PARAMS
+from src.synthetic import dummy_df
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="preload-then-fork needs os.fork")
+def test_preloaded_workers_are_ready_and_predict(tmp_path):
+    pipe, metrics = train_on_df(dummy_df())
+    save_model(pipe, tmp_path / "baseline.joblib", {"metrics": metrics})
+    port = _free_port()
+    env = {**os.environ, "MODEL_PATH": str(tmp_path / "baseline.joblib"),
+           "MODEL_RELOAD_INTERVAL_S": "0", "PYTHONPATH": str(ROOT)}
+    proc = subprocess.Popen([sys.executable, "-m", "src.serve", "--host", "127.0.0.1",
+                             "--port", str(port), "--workers", "2", "--no-access-log"],
+                            cwd=tmp_path, env=env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until(url + "/ready", proc, timeout=60)
+        ready = httpx.get(url + "/ready").json()
+        # loaded in the parent before the fork
+        assert ready["model_loaded"] and "ready" in ready["startup_seconds"]
+        for _ in range(4):
+            r = httpx.get(url + "/predict", params=PARAMS)
+            assert r.status_code == 200 and "predicted_price" in r.json()
+        r = httpx.post(url + "/predict_batch", json=[PARAMS, PARAMS])
+        assert len(r.json()["predicted_prices"]) == 2
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        code = proc.wait(timeout=30)
+    assert code == 0
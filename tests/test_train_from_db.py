@@ -0,0 +1,26 @@
+import sqlite3
+import numpy as np
+from src.load_to_db import bulk_load
+from src.models.train import FEATURES, TARGET
+from src.train_from_db import read_training_frame, train_from_frame
+from src.synthetic import dummy_df
+
+
+def test_chunked_read_is_compact_and_trains(tmp_path):
+    df = dummy_df()
+    df.insert(0, "id", np.arange(len(df)))
+    df["extra_text"] = "not selected"
+    df.loc[3, "neighbourhood"] = None
+    conn = sqlite3.connect(tmp_path / "airbnb.db")
+    bulk_load([df], conn, "sqlite")
+
+    out = read_training_frame(conn, "sqlite", chunksize=32)
+    assert list(out.columns) == FEATURES + [TARGET]
+    assert len(out) == len(df)
+    assert str(out["neighbourhood"].dtype) == "category" and out["neighbourhood"].isna().sum() == 1
+    assert out["accommodates"].dtype == np.float32
+    np.testing.assert_allclose(out[TARGET], df[TARGET])
+
+    model, metrics = train_from_frame(out, n_estimators=10)
+    assert metrics["mae"] >= 0 and metrics["n_train"] + metrics["n_valid"] == len(df)
+    assert model.predict(out.head(3)[FEATURES]).shape == (3,)